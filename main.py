@@ -1,7 +1,9 @@
 import os
 import uuid
 import asyncio
+import logging
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -16,6 +18,9 @@ from utils.job_manager import JobManager
 # Load environment variables
 load_dotenv()
 
+# Service debug output goes through logging; set LOG_LEVEL=DEBUG to see it
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(levelname)s %(name)s: %(message)s")
+
 app = FastAPI(title="YouTube Video Dubber", version="1.0.0")
 
 # Add CORS middleware
@@ -33,6 +38,19 @@ youtube_downloader = YouTubeDownloader()
 video_processor = VideoProcessor()
 ai_dubber = AIDubber()
 
+@app.on_event("startup")
+async def configure_executor():
+    """Size the default executor used by asyncio.to_thread for downloads, ffmpeg and transcription"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=int(os.getenv("THREAD_POOL_SIZE", str(min(32, (os.cpu_count() or 1) * 5)))))
+    )
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    """Release pooled connections and worker threads"""
+    ai_dubber.close()
+    await ai_dubber.translator.aclose()
+
 class DubRequest(BaseModel):
     youtube_url: str
     target_language: str
@@ -120,17 +138,33 @@ async def process_dubbing_job(job_id: str, youtube_url: str, target_language: st
         # Update job status
         job_manager.update_job(job_id, {"status": "downloading", "progress": 10})
         
-        # Step 1: Download YouTube video
-        video_path = await youtube_downloader.download_video(youtube_url, job_id)
-        job_manager.update_job(job_id, {"status": "extracting_audio", "progress": 20})
-        
-        # Step 2: Extract audio
-        audio_path = await video_processor.extract_audio(video_path, job_id)
-        job_manager.update_job(job_id, {"status": "ai_analysis", "progress": 30})
-        
-        # Step 3: AI-powered dubbing with speaker diarization
-        dubbed_audio_path = await ai_dubber.dub_with_ai_analysis(audio_path, target_language, job_id)
-        job_manager.update_job(job_id, {"status": "synchronizing", "progress": 85})
+        # Step 1: Download the video track in the background; only the final mux needs it
+        video_task = asyncio.create_task(youtube_downloader.download_video(youtube_url, job_id, video_only=True))
+        # Mark a download failure as retrieved even if the job fails before awaiting it
+        video_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            # Step 2: Extract audio from the much smaller audio-only download
+            try:
+                source_path = await youtube_downloader.download_audio(youtube_url, job_id)
+            except Exception:
+                # No separate audio stream available; download the full video (with audio) instead
+                video_task.cancel()
+                video_task = asyncio.create_task(youtube_downloader.download_video(youtube_url, job_id))
+                source_path = await video_task
+            job_manager.update_job(job_id, {"status": "extracting_audio", "progress": 20})
+            audio_path = await video_processor.extract_audio(source_path, job_id)
+            job_manager.update_job(job_id, {"status": "ai_analysis", "progress": 30})
+            
+            # Step 3: AI-powered dubbing with speaker diarization
+            dubbed_audio_path = await ai_dubber.dub_with_ai_analysis(audio_path, target_language, job_id)
+            job_manager.update_job(job_id, {"status": "synchronizing", "progress": 85})
+            
+            video_path = await video_task
+        finally:
+            # Cancelling kills the yt-dlp process, so a failed job stops downloading
+            if not video_task.done():
+                video_task.cancel()
+                await asyncio.gather(video_task, return_exceptions=True)
         
         # Step 4: Synchronize audio with video
         output_path = await video_processor.sync_audio_with_video(
@@ -1,17 +1,23 @@
 import os
 import asyncio
+import logging
 import numpy as np
 import librosa
-import whisper
+import scipy.signal
+import soundfile as sf
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import json
 from services.transcriber import Transcriber
-from services.translator import Translator
+from services.translator import Translator, TRANSLATION_BATCH_SIZE
 from services.tts_service import TTSService
+from utils.fs import ensure_dir
 from pyannote.audio import Pipeline
 
+logger = logging.getLogger(__name__)
+
 @dataclass
 class SpeakerSegment:
     """Represents a segment with speaker and AI analysis"""
@@ -33,68 +39,98 @@ class AIDubber:
         self.transcriber = Transcriber()
         self.translator = Translator()
         self.tts_service = TTSService()
-        self.whisper_model = whisper.load_model("base")
-        print("DEBUG: AI Dubber initialized with PyAnnote speaker diarization and voice matching")
+        # STFT settings shared by every voice-characteristics pass so the window is built once
+        self._n_fft = 2048
+        self._stft_window = scipy.signal.get_window("hann", self._n_fft, fftbins=True).astype(np.float32)
+        # Dedicated pool for CPU-bound librosa work (numpy/FFT release the GIL)
+        self._analysis_executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="voice_analysis")
+        logger.debug("AI Dubber initialized with PyAnnote speaker diarization and voice matching")
         
+    def close(self):
+        """Release the voice analysis and TTS thread pools"""
+        self._analysis_executor.shutdown(wait=False)
+        self.tts_service.close()
+    
     async def dub_with_ai_analysis(self, audio_path: str, target_language: str, job_id: str, timing_aware: bool = True) -> str:
         """AI-powered dubbing with speaker diarization and intelligent voice matching"""
         try:
-            print(f"DEBUG: Starting AI-powered dubbing for job {job_id} (timing_aware: {timing_aware})")
+            logger.debug("Starting AI-powered dubbing for job %s (timing_aware: %s)", job_id, timing_aware)
             
             # Step 1: Get PyAnnote speaker diarization
-            print("DEBUG: Step 1 - Starting PyAnnote speaker diarization...")
+            logger.debug("Step 1 - Starting PyAnnote speaker diarization...")
             huggingface_token = os.getenv("HUGGINGFACE_TOKEN")
             if not huggingface_token:
                 raise Exception("HUGGINGFACE_TOKEN environment variable not set. Please add it to your .env file.")
             
-            print("DEBUG: Loading PyAnnote pipeline...")
+            logger.debug("Loading PyAnnote pipeline...")
             pipeline = Pipeline.from_pretrained(
                 "pyannote/speaker-diarization-3.1",
                 use_auth_token=huggingface_token
             )
-            print("DEBUG: Running PyAnnote diarization with reduced sensitivity...")
+            logger.debug("Running PyAnnote diarization with reduced sensitivity...")
             # Use parameters to reduce speaker detection sensitivity
             diarization = pipeline(audio_path, min_speakers=1, max_speakers=5)
-            print("DEBUG: PyAnnote diarization completed")
-            print("DEBUG: PyAnnote diarization result:")
-            print(diarization)
+            logger.debug("PyAnnote diarization completed")
+            logger.debug("PyAnnote diarization result:\n%s", diarization)
             
             # Step 2: AI-powered transcription with PyAnnote speaker diarization
-            print("DEBUG: Step 2 - Starting AI transcription with PyAnnote...")
+            logger.debug("Step 2 - Starting AI transcription with PyAnnote...")
             segments = await self._ai_transcribe_with_pyannote(audio_path, diarization)
-            print(f"DEBUG: AI transcription completed, {len(segments)} segments created")
+            logger.debug("AI transcription completed, %s segments created", len(segments))
             
             # Step 3: AI analysis of each speaker segment
-            print("DEBUG: Step 3 - Starting AI analysis of speakers...")
+            logger.debug("Step 3 - Starting AI analysis of speakers...")
             segments = await self._analyze_speakers_ai(segments, audio_path)
-            print(f"DEBUG: AI analysis completed, {len(segments)} segments analyzed")
+            logger.debug("AI analysis completed, %s segments analyzed", len(segments))
             
             # Step 4: Translate with context preservation (and timing awareness if enabled)
-            print(f"DEBUG: Step 4 - Starting translation step...")
-            segments = await self._translate_with_context(segments, target_language, timing_aware)
-            print(f"DEBUG: Translation completed, {len(segments)} segments processed")
+            logger.debug("Step 4 - Starting translation step...")
+            voice_mapping_task = None
+            if timing_aware:
+                # Voice matching only needs the original segments, so run it alongside translation and
+                # let TTS workers synthesize each group as soon as its translation lands
+                voice_mapping_task = asyncio.create_task(self._match_speaker_voices(segments, target_language))
+                speech_queue = asyncio.Queue()
+                speech_workers = [
+                    asyncio.create_task(self._prefetch_speech_worker(speech_queue, voice_mapping_task, target_language))
+                    for _ in range(self.tts_service.concurrency)
+                ]
+                try:
+                    segments = await self._translate_with_context(segments, target_language, timing_aware, speech_queue)
+                finally:
+                    for _ in speech_workers:
+                        speech_queue.put_nowait(None)
+                    await asyncio.gather(*speech_workers)
+            else:
+                segments = await self._translate_with_context(segments, target_language, timing_aware)
+            logger.debug("Translation completed, %s segments processed", len(segments))
             
             # Step 5: Intelligent voice matching on groups (if timing_aware)
             if timing_aware and hasattr(self, 'translated_groups') and self.translated_groups:
-                print("DEBUG: Step 5 - Starting intelligent voice matching on groups...")
-                self.translated_groups = await self._match_voices_on_groups(self.translated_groups, segments, target_language)
-                print(f"DEBUG: Group voice matching completed, {len(self.translated_groups)} groups matched")
+                logger.debug("Step 5 - Starting intelligent voice matching on groups...")
+                speaker_voice_mapping = await voice_mapping_task
+                self.translated_groups = await self._match_voices_on_groups(
+                    self.translated_groups, segments, target_language, speaker_voice_mapping
+                )
+                logger.debug("Group voice matching completed, %s groups matched", len(self.translated_groups))
             else:
-                print("DEBUG: Step 5 - Skipping group voice matching (not timing_aware or no groups)")
+                if voice_mapping_task:
+                    voice_mapping_task.cancel()
+                logger.debug("Step 5 - Skipping group voice matching (not timing_aware or no groups)")
                 # Fallback to individual segment voice matching
-                print("DEBUG: Step 5 - Starting intelligent voice matching on individual segments...")
+                logger.debug("Step 5 - Starting intelligent voice matching on individual segments...")
                 segments = await self._match_voices_intelligently(segments, target_language)
-                print(f"DEBUG: Individual voice matching completed, {len(segments)} segments matched")
+                logger.debug("Individual voice matching completed, %s segments matched", len(segments))
             
             # Step 6: Generate AI-enhanced speech (with timing adjustment if enabled)
-            print(f"DEBUG: Step 6 - Starting speech generation step...")
+            logger.debug("Step 6 - Starting speech generation step...")
             dubbed_audio_path = await self._generate_ai_speech(segments, target_language, job_id, timing_aware)
-            print(f"DEBUG: Speech generation completed")
+            logger.debug("Speech generation completed")
             
             return dubbed_audio_path
             
         except Exception as e:
-            print(f"DEBUG: AI dubbing failed with error: {str(e)}")
+            logger.warning("AI dubbing failed with error: %s", e)
             raise Exception(f"AI dubbing failed: {str(e)}")
     
 
@@ -102,29 +138,23 @@ class AIDubber:
     async def _ai_transcribe_with_pyannote(self, audio_path: str, diarization) -> List[SpeakerSegment]:
         """AI-powered transcription with PyAnnote speaker diarization"""
         try:
-            print(f"DEBUG: Starting AI transcription with PyAnnote speaker detection")
+            logger.debug("Starting AI transcription with PyAnnote speaker detection")
             
             # Step 1: Use Whisper for transcription
-            print("DEBUG: Running Whisper transcription...")
-            result = self.whisper_model.transcribe(
-                audio_path,
-                verbose=True,
-                word_timestamps=True,
-                language="en"
-            )
-            print("DEBUG: Whisper transcription completed")
-            print("-----------------Whisper result----------------- ")
-            print(result)
+            logger.debug("Running Whisper transcription...")
+            whisper_segments = await self.transcriber.transcribe_with_timestamps(audio_path, "en")
+            logger.debug("Whisper transcription completed")
+            logger.debug("-----------------Whisper result-----------------\n%s", whisper_segments)
             
             # Step 2: Align Whisper segments with PyAnnote diarization
-            print("DEBUG: Aligning Whisper segments with PyAnnote diarization...")
-            segments = self._align_whisper_with_pyannote(result['segments'], diarization)
-            print(f"DEBUG: Alignment completed, created {len(segments)} segments with PyAnnote speaker detection")
+            logger.debug("Aligning Whisper segments with PyAnnote diarization...")
+            segments = self._align_whisper_with_pyannote(whisper_segments, diarization)
+            logger.debug("Alignment completed, created %s segments with PyAnnote speaker detection", len(segments))
             
             return segments
             
         except Exception as e:
-            print(f"DEBUG: AI transcription failed with error: {str(e)}")
+            logger.warning("AI transcription failed with error: %s", e)
             raise Exception(f"AI transcription failed: {str(e)}")
     
 
@@ -142,12 +172,12 @@ class AIDubber:
                     'end': turn.end,
                     'speaker': speaker
                 })
-                print(f"DEBUG: PyAnnote - Speaker {speaker} speaks from {turn.start:.1f}s to {turn.end:.1f}s")
+                logger.debug("PyAnnote - Speaker %s speaks from %.1fs to %.1fs", speaker, turn.start, turn.end)
             
             # Sort by start time
             speaker_timeline.sort(key=lambda x: x['start'])
             
-            print(f"DEBUG: PyAnnote found {len(set(s['speaker'] for s in speaker_timeline))} unique speakers")
+            logger.debug("PyAnnote found %s unique speakers", len(set(s['speaker'] for s in speaker_timeline)))
             
             # Align each Whisper segment with PyAnnote speaker
             for i, segment in enumerate(whisper_segments):
@@ -180,7 +210,7 @@ class AIDubber:
                 )
                 
                 segments.append(speaker_segment)
-                print(f"DEBUG: Segment {i}: Speaker {assigned_speaker}, Text: {segment['text'][:50]}...")
+                logger.debug("Segment %s: Speaker %s, Text: %s...", i, assigned_speaker, segment['text'][:50])
             
             # Post-process to merge similar speakers and reduce speaker count
             segments = self._merge_similar_speakers(segments)
@@ -188,7 +218,7 @@ class AIDubber:
             return segments
             
         except Exception as e:
-            print(f"PyAnnote alignment error: {e}")
+            logger.warning("PyAnnote alignment error: %s", e)
             # Fallback: assign all segments to single speaker
             segments = []
             for i, segment in enumerate(whisper_segments):
@@ -211,10 +241,10 @@ class AIDubber:
             
             # Count unique speakers
             unique_speakers = set(seg.speaker_id for seg in segments)
-            print(f"DEBUG: Before merging: {len(unique_speakers)} unique speakers")
+            logger.debug("Before merging: %s unique speakers", len(unique_speakers))
             
             if len(unique_speakers) <= 3:
-                print(f"DEBUG: Speaker count is reasonable ({len(unique_speakers)}), skipping merge")
+                logger.debug("Speaker count is reasonable (%s), skipping merge", len(unique_speakers))
                 return segments
             
             # Create a mapping to reduce speaker count to max 3 speakers
@@ -263,16 +293,16 @@ class AIDubber:
                     old_speaker = segment.speaker_id
                     segment.speaker_id = speaker_mapping[segment.speaker_id]
                     if old_speaker != segment.speaker_id:
-                        print(f"DEBUG: Merged speaker {old_speaker} -> {segment.speaker_id}")
+                        logger.debug("Merged speaker %s -> %s", old_speaker, segment.speaker_id)
             
             # Count final unique speakers
             final_speakers = set(seg.speaker_id for seg in segments)
-            print(f"DEBUG: After merging: {len(final_speakers)} unique speakers")
+            logger.debug("After merging: %s unique speakers", len(final_speakers))
             
             return segments
             
         except Exception as e:
-            print(f"DEBUG: Speaker merging failed: {e}")
+            logger.warning("Speaker merging failed: %s", e)
             return segments
     
 
@@ -282,10 +312,11 @@ class AIDubber:
     async def _analyze_speakers_ai(self, segments: List[SpeakerSegment], audio_path: str) -> List[SpeakerSegment]:
         """AI analysis of each speaker's voice characteristics for voice matching"""
         try:
-            print(f"DEBUG: Starting voice characteristics analysis for voice matching")
+            logger.debug("Starting voice characteristics analysis for voice matching")
             
             # Load audio for analysis
             y, sr = librosa.load(audio_path, sr=None)
+            y = np.ascontiguousarray(y, dtype=np.float32)
             
             # Group segments by speaker for analysis
             speaker_groups = defaultdict(list)
@@ -294,36 +325,48 @@ class AIDubber:
             
             # Analyze each speaker's characteristics
             for speaker_id, speaker_segments in speaker_groups.items():
-                print(f"DEBUG: Analyzing voice characteristics for speaker {speaker_id} with {len(speaker_segments)} segments")
+                logger.debug("Analyzing voice characteristics for speaker %s with %s segments", speaker_id, len(speaker_segments))
                 
                 # Analyze first few segments of this speaker
                 analysis_segments = speaker_segments[:3]  # Analyze first 3 segments
                 
-                all_characteristics = []
-                
+                # Slice out the segments worth analyzing
+                candidates = []
                 for segment in analysis_segments:
-                    try:
-                        # Extract segment audio
-                        start_sample = int(segment.start_time * sr)
-                        end_sample = int(segment.end_time * sr)
-                        segment_audio = y[start_sample:end_sample]
-                        
-                        # Skip if segment is too short
-                        if len(segment_audio) < sr * 0.5:  # Less than 0.5 seconds
-                            continue
-                        
-                        # AI analysis of voice characteristics
-                        characteristics = await self._analyze_voice_characteristics(segment_audio, sr)
-                        segment.voice_characteristics = characteristics
-                        all_characteristics.append(characteristics)
-                        
-                        print(f"DEBUG: Speaker {speaker_id} - Pitch: {characteristics.get('pitch_mean', 0):.1f}Hz, "
-                              f"Energy: {characteristics.get('energy_mean', 0):.3f}, "
-                              f"Spectral Centroid: {characteristics.get('spectral_centroid_mean', 0):.1f}Hz")
-                        
-                    except Exception as e:
-                        print(f"DEBUG: Error analyzing segment for speaker {speaker_id}: {e}")
+                    # Extract segment audio
+                    start_sample = int(segment.start_time * sr)
+                    end_sample = int(segment.end_time * sr)
+                    segment_audio = y[start_sample:end_sample]
+                    
+                    # Skip if segment is too short
+                    if len(segment_audio) < sr * 0.5:  # Less than 0.5 seconds
+                        continue
+
+                    # Skip near-silent segments (breaths, pauses) - features would only be noise
+                    if np.mean(np.abs(segment_audio)) < 1e-3:
+                        logger.debug("Skipping near-silent segment for speaker %s", speaker_id)
+                        continue
+                    
+                    candidates.append((segment, segment_audio))
+                
+                # AI analysis of voice characteristics, run in parallel on the analysis pool
+                results = await asyncio.gather(
+                    *(self._analyze_voice_characteristics(segment_audio, sr) for _, segment_audio in candidates),
+                    return_exceptions=True
+                )
+                
+                all_characteristics = []
+                for (segment, _), characteristics in zip(candidates, results):
+                    if isinstance(characteristics, Exception):
+                        logger.warning("Error analyzing segment for speaker %s: %s", speaker_id, characteristics)
                         continue
+                    
+                    segment.voice_characteristics = characteristics
+                    all_characteristics.append(characteristics)
+                    
+                    logger.debug("Speaker %s - Pitch: %.1fHz, Energy: %.3f, Spectral Centroid: %.1fHz",
+                                 speaker_id, characteristics.get('pitch_mean', 0), characteristics.get('energy_mean', 0),
+                                 characteristics.get('spectral_centroid_mean', 0))
                 
                 # Calculate average characteristics for this speaker
                 if all_characteristics:
@@ -341,7 +384,7 @@ class AIDubber:
                         segment.gender = "unknown"  # We're not using gender detection
                         segment.emotion = "neutral"  # Keep default emotion
                 
-                print(f"DEBUG: Completed voice analysis for speaker {speaker_id}")
+                logger.debug("Completed voice analysis for speaker %s", speaker_id)
             
             return segments
             
@@ -350,16 +393,26 @@ class AIDubber:
     
     async def _analyze_voice_characteristics(self, audio: np.ndarray, sr: int) -> Dict:
         """Analyze voice characteristics using AI/ML features"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._analysis_executor, self._analyze_voice_characteristics_sync, audio, sr
+        )
+    
+    def _analyze_voice_characteristics_sync(self, audio: np.ndarray, sr: int) -> Dict:
+        """Synchronous voice characteristics extraction with librosa"""
         try:
             characteristics = {}
             
+            # Compute the magnitude spectrogram once and reuse it for every spectral feature
+            S = np.abs(librosa.stft(audio, n_fft=self._n_fft, window=self._stft_window)).astype(np.float32, copy=False)
+            
             # Spectral features
-            spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=sr)[0]
+            spectral_centroids = librosa.feature.spectral_centroid(S=S, sr=sr)[0]
             characteristics['spectral_centroid_mean'] = float(np.mean(spectral_centroids))
             characteristics['spectral_centroid_std'] = float(np.std(spectral_centroids))
             
             # Pitch features
-            pitches, magnitudes = librosa.piptrack(y=audio, sr=sr, threshold=0.1)
+            pitches, magnitudes = librosa.piptrack(S=S, sr=sr, threshold=0.1)
             pitches = pitches[magnitudes > 0.1]
             if len(pitches) > 0:
                 characteristics['pitch_mean'] = float(np.mean(pitches))
@@ -367,7 +420,8 @@ class AIDubber:
                 characteristics['pitch_range'] = float(np.max(pitches) - np.min(pitches))
             
             # MFCC features (voice timbre)
-            mfccs = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=13)
+            mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr)
+            mfccs = librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=13)
             characteristics['mfcc_mean'] = float(np.mean(mfccs))
             characteristics['mfcc_std'] = float(np.std(mfccs))
             
@@ -376,6 +430,7 @@ class AIDubber:
             characteristics['speaking_rate'] = float(np.mean(zero_crossings))
             
             # Energy features
+            # Time-domain RMS: the energy thresholds used for voice matching and emotion are calibrated on this scale
             rms = librosa.feature.rms(y=audio)[0]
             characteristics['energy_mean'] = float(np.mean(rms))
             characteristics['energy_std'] = float(np.std(rms))
@@ -383,7 +438,7 @@ class AIDubber:
             return characteristics
             
         except Exception as e:
-            print(f"Voice analysis error: {e}")
+            logger.warning("Voice analysis error: %s", e)
             return {}
     
 
@@ -409,17 +464,17 @@ class AIDubber:
                 return "neutral"
                 
         except Exception as e:
-            print(f"Emotion detection error: {e}")
+            logger.warning("Emotion detection error: %s", e)
             return "neutral"
     
     async def _match_voices_intelligently(self, segments: List[SpeakerSegment], target_language: str) -> List[SpeakerSegment]:
         """Intelligent voice matching based on AI analysis and available voices"""
         try:
-            print(f"DEBUG: Starting intelligent voice matching")
+            logger.debug("Starting intelligent voice matching")
             
             # Step 1: Download available voices from ElevenLabs
             available_voices = await self.tts_service.get_available_voices()
-            print(f"DEBUG: Downloaded {len(available_voices)} available voices from ElevenLabs")
+            logger.debug("Downloaded %s available voices from ElevenLabs", len(available_voices))
             
             # Step 2: Group by speaker and analyze patterns
             speaker_profiles = defaultdict(list)
@@ -449,9 +504,8 @@ class AIDubber:
                     for segment in speaker_segments:
                         segment.gender = dominant_gender
                     
-                    print(f"DEBUG: Speaker {speaker_id} profile - Gender: {dominant_gender}, "
-                          f"Pitch: {avg_profile.get('pitch_mean', 0):.1f}Hz, "
-                          f"Energy: {avg_profile.get('energy_mean', 0):.3f}")
+                    logger.debug("Speaker %s profile - Gender: %s, Pitch: %.1fHz, Energy: %.3f",
+                                 speaker_id, dominant_gender, avg_profile.get('pitch_mean', 0), avg_profile.get('energy_mean', 0))
             
             # Step 4: Match speakers to available voices based on characteristics
             if not available_voices:
@@ -464,7 +518,7 @@ class AIDubber:
             # Step 5: Assign matched voice IDs to segments
             for speaker_id, voice_info in speaker_voice_mapping.items():
                 # Only print once per speaker, not per segment
-                print(f"DEBUG: Speaker {speaker_id} matched to voice: {voice_info.get('name')} ({voice_info.get('voice_id')})")
+                logger.debug("Speaker %s matched to voice: %s (%s)", speaker_id, voice_info.get('name'), voice_info.get('voice_id'))
                 
                 # Assign to all segments of this speaker
                 for segment in segments:
@@ -477,14 +531,36 @@ class AIDubber:
         except Exception as e:
             raise Exception(f"Voice matching failed: {str(e)}")
     
-    async def _match_voices_on_groups(self, translated_groups: List[Dict], original_segments: List[SpeakerSegment], target_language: str) -> List[Dict]:
+    async def _match_voices_on_groups(self, translated_groups: List[Dict], original_segments: List[SpeakerSegment], target_language: str, speaker_voice_mapping: Optional[Dict] = None) -> List[Dict]:
         """Match voices intelligently on groups instead of individual segments"""
         try:
-            print(f"DEBUG: Starting group-based voice matching for {len(translated_groups)} groups")
+            logger.debug("Starting group-based voice matching for %s groups", len(translated_groups))
+            
+            if speaker_voice_mapping is None:
+                speaker_voice_mapping = await self._match_speaker_voices(original_segments, target_language)
+            
+            # Assign matched voice IDs to groups
+            for group in translated_groups:
+                speaker_id = group["speaker_id"]
+                if speaker_id in speaker_voice_mapping:
+                    voice_info = speaker_voice_mapping[speaker_id]
+                    group["matched_voice_id"] = voice_info.get('voice_id')
+                    group["matched_voice_name"] = voice_info.get('name')
+                    logger.debug("Group (Speaker %s) matched to voice: %s (%s)", speaker_id, voice_info.get('name'), voice_info.get('voice_id'))
+                else:
+                    logger.debug("No voice match found for speaker %s in group", speaker_id)
+            
+            return translated_groups
             
+        except Exception as e:
+            raise Exception(f"Group voice matching failed: {str(e)}")
+    
+    async def _match_speaker_voices(self, original_segments: List[SpeakerSegment], target_language: str) -> Dict:
+        """Build a speaker -> ElevenLabs voice mapping from the original segments' voice profiles"""
+        try:
             # Step 1: Download available voices from ElevenLabs
             available_voices = await self.tts_service.get_available_voices()
-            print(f"DEBUG: Downloaded {len(available_voices)} available voices from ElevenLabs")
+            logger.debug("Downloaded %s available voices from ElevenLabs", len(available_voices))
             
             # Step 2: Create voice profiles for each speaker from original segments
             speaker_profiles = {}
@@ -515,33 +591,33 @@ class AIDubber:
                     avg_profile['gender'] = dominant_gender
                     
                     speaker_avg_profiles[speaker_id] = avg_profile
-                    print(f"DEBUG: Speaker {speaker_id} profile - Gender: {dominant_gender}, "
-                          f"Pitch: {avg_profile.get('pitch_mean', 0):.1f}Hz, "
-                          f"Energy: {avg_profile.get('energy_mean', 0):.3f}")
+                    logger.debug("Speaker %s profile - Gender: %s, Pitch: %.1fHz, Energy: %.3f",
+                                 speaker_id, dominant_gender, avg_profile.get('pitch_mean', 0), avg_profile.get('energy_mean', 0))
             
             # Step 4: Match speakers to available voices
             if not available_voices:
                 raise Exception("Failed to download available voices from ElevenLabs - voice matching cannot proceed")
             
-            speaker_voice_mapping = await self._match_speakers_to_voices(
+            return await self._match_speakers_to_voices(
                 speaker_avg_profiles, available_voices, target_language
             )
             
-            # Step 5: Assign matched voice IDs to groups
-            for group in translated_groups:
-                speaker_id = group["speaker_id"]
-                if speaker_id in speaker_voice_mapping:
-                    voice_info = speaker_voice_mapping[speaker_id]
-                    group["matched_voice_id"] = voice_info.get('voice_id')
-                    group["matched_voice_name"] = voice_info.get('name')
-                    print(f"DEBUG: Group (Speaker {speaker_id}) matched to voice: {voice_info.get('name')} ({voice_info.get('voice_id')})")
-                else:
-                    print(f"DEBUG: No voice match found for speaker {speaker_id} in group")
-            
-            return translated_groups
-            
         except Exception as e:
-            raise Exception(f"Group voice matching failed: {str(e)}")
+            raise Exception(f"Speaker voice matching failed: {str(e)}")
+    
+    async def _prefetch_speech_worker(self, speech_queue: asyncio.Queue, voice_mapping_task: asyncio.Task, target_language: str):
+        """Synthesize translated groups from the queue into the TTS cache until a None sentinel arrives"""
+        while True:
+            group = await speech_queue.get()
+            if group is None:
+                return
+            try:
+                speaker_voice_mapping = await asyncio.shield(voice_mapping_task)
+                voice_id = speaker_voice_mapping.get(group["speaker_id"], {}).get('voice_id')
+                await self.tts_service.prefetch_speech(group.get("translated_text", ""), voice_id, target_language)
+            except Exception as e:
+                # Best effort only - timed generation will synthesize anything missing from the cache
+                logger.warning("Speech prefetch failed for speaker %s: %s", group.get('speaker_id'), e)
     
     async def _match_speakers_to_voices(self, voice_profiles: Dict, available_voices: List, target_language: str) -> Dict:
         """Match speaker profiles to available voices based on characteristics"""
@@ -550,12 +626,12 @@ class AIDubber:
             
             # Filter voices by language support using language field
             language_voices = []
-            print(f"DEBUG: Checking {len(available_voices)} voices for language support: {target_language}")
+            logger.debug("Checking %s voices for language support: %s", len(available_voices), target_language)
             
             for voice in available_voices:
                 # Check verified_languages array (proper ElevenLabs API approach)
                 if hasattr(voice, 'verified_languages') and voice.verified_languages:
-                    print(f"DEBUG: Voice {voice.name} - Verified languages: {voice.verified_languages}")
+                    logger.debug("Voice %s - Verified languages: %s", voice.name, voice.verified_languages)
                     
                     # Check if target language is in verified_languages
                     supports_language = False
@@ -564,27 +640,27 @@ class AIDubber:
                         if hasattr(lang_info, 'language') and lang_info.language:
                             if lang_info.language.lower() == target_language.lower():
                                 supports_language = True
-                                print(f"DEBUG: Found language match: {lang_info.language}")
+                                logger.debug("Found language match: %s", lang_info.language)
                                 break
                     
                     if supports_language:
                         language_voices.append(voice)
-                        print(f"DEBUG: ✓ Voice {voice.name} supports {target_language}")
+                        logger.debug("✓ Voice %s supports %s", voice.name, target_language)
                     else:
-                        print(f"DEBUG: ✗ Voice {voice.name} does not support {target_language}")
+                        logger.debug("✗ Voice %s does not support %s", voice.name, target_language)
                 else:
-                    print(f"DEBUG: Voice {voice.name} - No verified_languages available")
+                    logger.debug("Voice %s - No verified_languages available", voice.name)
             
             if not language_voices:
-                print(f"DEBUG: No voices found supporting language: {target_language}")
-                print("DEBUG: Available voices and their verified_languages:")
+                logger.debug("No voices found supporting language: %s", target_language)
+                logger.debug("Available voices and their verified_languages:")
                 for voice in available_voices:
                     if hasattr(voice, 'verified_languages') and voice.verified_languages:
                         languages = [lang.language for lang in voice.verified_languages if hasattr(lang, 'language') and lang.language]
-                        print(f"  - {voice.name}: {languages}")
+                        logger.debug("  - %s: %s", voice.name, languages)
                 raise Exception(f"No voices found supporting language: {target_language}")
             
-            print(f"DEBUG: Found {len(language_voices)} voices supporting language {target_language}")
+            logger.debug("Found %s voices supporting language %s", len(language_voices), target_language)
             
             # Match each speaker to the best available voice
             used_voices = set()  # Track used voices to avoid duplicates
@@ -608,7 +684,7 @@ class AIDubber:
                         best_voice = voice
                         best_score = score
                         used_voices.add(voice.voice_id)
-                        print(f"DEBUG: Selected unused voice {voice.name} for speaker {speaker_id}")
+                        logger.debug("Selected unused voice %s for speaker %s", voice.name, speaker_id)
                         break
                 
                 # If all voices are used, find the least used voice
@@ -631,11 +707,11 @@ class AIDubber:
                     if least_used_voice:
                         best_voice = least_used_voice
                         used_voices.add(best_voice.voice_id)
-                        print(f"DEBUG: All voices used, selected least used voice {best_voice.name} for speaker {speaker_id}")
+                        logger.debug("All voices used, selected least used voice %s for speaker %s", best_voice.name, speaker_id)
                     else:
                         # Fallback to best voice if no least used found
                         best_voice, best_score = candidate_voices[0]
-                        print(f"DEBUG: Fallback to best voice {best_voice.name} for speaker {speaker_id}")
+                        logger.debug("Fallback to best voice %s for speaker %s", best_voice.name, speaker_id)
                 
                 if not best_voice:
                     raise Exception(f"No suitable voice found for speaker {speaker_id} with characteristics: {profile}")
@@ -645,12 +721,12 @@ class AIDubber:
                     'name': best_voice.name,
                     'match_score': best_score
                 }
-                print(f"DEBUG: Speaker {speaker_id} matched to {best_voice.name} with score {best_score:.2f}")
+                logger.debug("Speaker %s matched to %s with score %.2f", speaker_id, best_voice.name, best_score)
             
             return speaker_voice_mapping
             
         except Exception as e:
-            print(f"Voice matching error: {e}")
+            logger.warning("Voice matching error: %s", e)
             return {}
     
     def _calculate_voice_match_score(self, speaker_profile: Dict, voice) -> float:
@@ -715,28 +791,27 @@ class AIDubber:
             if speaker_speaking_rate > 0.1:  # Fast speaker
                 score += 0.5
             
-            print(f"DEBUG: Voice match score for {voice.name}: {score:.2f} "
-                  f"(Pitch: {speaker_pitch:.1f}Hz, Energy: {speaker_energy:.3f}, "
-                  f"Spectral: {speaker_spectral_centroid:.1f}Hz)")
+            logger.debug("Voice match score for %s: %.2f (Pitch: %.1fHz, Energy: %.3f, Spectral: %.1fHz)",
+                         voice.name, score, speaker_pitch, speaker_energy, speaker_spectral_centroid)
             
             return score
             
         except Exception as e:
-            print(f"Voice match scoring error: {e}")
+            logger.warning("Voice match scoring error: %s", e)
             return 0.0
     
-    async def _translate_with_context(self, segments: List[SpeakerSegment], target_language: str, timing_aware: bool = True) -> List[SpeakerSegment]:
+    async def _translate_with_context(self, segments: List[SpeakerSegment], target_language: str, timing_aware: bool = True, speech_queue: Optional[asyncio.Queue] = None) -> List[SpeakerSegment]:
         """Translate with context preservation for better quality"""
         try:
-            print(f"DEBUG: Starting context-aware translation (timing_aware: {timing_aware})")
+            logger.debug("Starting context-aware translation (timing_aware: %s)", timing_aware)
             
             if timing_aware:
                 # Group consecutive segments by speaker for better context
                 grouped_segments = self._group_consecutive_segments_by_speaker(segments)
-                print(f"DEBUG: Grouped {len(segments)} individual segments into {len(grouped_segments)} meaningful chunks")
+                logger.debug("Grouped %s individual segments into %s meaningful chunks", len(segments), len(grouped_segments))
                 
                 # Translate each group as a whole
-                translated_groups = await self._translate_segment_groups(grouped_segments, target_language)
+                translated_groups = await self._translate_segment_groups(grouped_segments, target_language, speech_queue)
                 
                 # Store the translated groups for TTS generation
                 for i, group in enumerate(translated_groups):
@@ -745,7 +820,7 @@ class AIDubber:
                 # Store groups in a class variable for TTS to use
                 self.translated_groups = translated_groups
                 
-                print(f"DEBUG: Stored {len(translated_groups)} translated groups for TTS generation")
+                logger.debug("Stored %s translated groups for TTS generation", len(translated_groups))
                 
                 # Return segments as-is (they won't be used for TTS anyway)
                 return segments
@@ -762,12 +837,12 @@ class AIDubber:
                             
                             if translated_text and not translated_text.startswith("Anterior:"):
                                 segment.text = translated_text.strip()
-                                print(f"DEBUG: Translated segment {i} (Speaker {segment.speaker_id}): {translated_text[:50]}...")
+                                logger.debug("Translated segment %s (Speaker %s): %s...", i, segment.speaker_id, translated_text[:50])
                             else:
-                                print(f"DEBUG: Skipping corrupted translation for segment {i}")
+                                logger.debug("Skipping corrupted translation for segment %s", i)
                                 
                         except Exception as e:
-                            print(f"DEBUG: Translation error for segment {i}: {e}")
+                            logger.warning("Translation error for segment %s: %s", i, e)
                             continue
             
             return segments
@@ -790,16 +865,16 @@ class AIDubber:
                 "text": segments[0].text.strip()
             }
             
-            print(f"DEBUG: === DETAILED GROUPING ANALYSIS ===")
-            print(f"DEBUG: Processing {len(segments)} segments...")
+            logger.debug("=== DETAILED GROUPING ANALYSIS ===")
+            logger.debug("Processing %s segments...", len(segments))
             
             for i in range(1, len(segments)):
                 current_segment = segments[i]
                 previous_segment = segments[i-1]
                 
-                print(f"DEBUG: Segment {i}: Speaker {current_segment.speaker_id}, "
-                      f"Time: {current_segment.start_time:.1f}s-{current_segment.end_time:.1f}s, "
-                      f"Text: '{current_segment.text.strip()[:50]}...'")
+                logger.debug("Segment %s: Speaker %s, Time: %.1fs-%.1fs, Text: '%.50s...'",
+                             i, current_segment.speaker_id, current_segment.start_time, current_segment.end_time,
+                             current_segment.text.strip())
                 
                 # Check if we should continue the current group
                 should_continue = (
@@ -812,12 +887,12 @@ class AIDubber:
                     current_group["segments"].append(current_segment)
                     current_group["end_time"] = current_segment.end_time
                     current_group["text"] += " " + current_segment.text.strip()
-                    print(f"DEBUG: ✓ Added to current group (now {len(current_group['segments'])} segments)")
+                    logger.debug("✓ Added to current group (now %s segments)", len(current_group['segments']))
                 else:
                     # Finalize current group and start new one
                     if current_group["text"].strip():
                         grouped_chunks.append(current_group)
-                        print(f"DEBUG: Finalized group with {len(current_group['segments'])} segments: '{current_group['text'][:100]}...'")
+                        logger.debug("Finalized group with %s segments: '%s...'", len(current_group['segments']), current_group['text'][:100])
                     
                     # Start new group
                     current_group = {
@@ -827,23 +902,23 @@ class AIDubber:
                         "end_time": current_segment.end_time,
                         "text": current_segment.text.strip()
                     }
-                    print(f"DEBUG: Started new group for speaker {current_segment.speaker_id}")
+                    logger.debug("Started new group for speaker %s", current_segment.speaker_id)
             
             # Add the last group
             if current_group["text"].strip():
                 grouped_chunks.append(current_group)
-                print(f"DEBUG: Finalized last group with {len(current_group['segments'])} segments: '{current_group['text'][:100]}...'")
+                logger.debug("Finalized last group with %s segments: '%s...'", len(current_group['segments']), current_group['text'][:100])
             
-            print(f"DEBUG: Created {len(grouped_chunks)} grouped chunks:")
+            logger.debug("Created %s grouped chunks:", len(grouped_chunks))
             for i, chunk in enumerate(grouped_chunks):
-                print(f"  Chunk {i}: Speaker {chunk['speaker_id']}, {len(chunk['segments'])} segments, "
-                      f"Duration: {chunk['end_time'] - chunk['start_time']:.1f}s, "
-                      f"Text: {chunk['text'][:100]}...")
+                logger.debug("  Chunk %s: Speaker %s, %s segments, Duration: %.1fs, Text: %.100s...",
+                             i, chunk['speaker_id'], len(chunk['segments']), chunk['end_time'] - chunk['start_time'],
+                             chunk['text'])
             
             return grouped_chunks
             
         except Exception as e:
-            print(f"DEBUG: Error grouping segments: {e}")
+            logger.warning("Error grouping segments: %s", e)
             # Fallback: return individual segments as groups
             return [{"speaker_id": seg.speaker_id, "segments": [seg], 
                     "start_time": seg.start_time, "end_time": seg.end_time, 
@@ -866,81 +941,77 @@ class AIDubber:
             
             # Decision logic
             if time_gap > 2.0:  # Gap too large
-                print(f"DEBUG: NOT combining - time gap too large: {time_gap:.1f}s")
+                logger.debug("NOT combining - time gap too large: %.1fs", time_gap)
                 return False
             elif combined_length > 400:  # Text too long
-                print(f"DEBUG: NOT combining - combined text too long: {combined_length} chars")
+                logger.debug("NOT combining - combined text too long: %s chars", combined_length)
                 return False
             else:
-                print(f"DEBUG: WILL combine - gap: {time_gap:.1f}s, length: {combined_length} chars")
+                logger.debug("WILL combine - gap: %.1fs, length: %s chars", time_gap, combined_length)
                 return True
                 
         except Exception as e:
-            print(f"DEBUG: Error in segment combination logic: {e}")
+            logger.warning("Error in segment combination logic: %s", e)
             return False
     
-    async def _translate_segment_groups(self, grouped_segments: List[Dict], target_language: str) -> List[Dict]:
+    async def _translate_segment_groups(self, grouped_segments: List[Dict], target_language: str, speech_queue: Optional[asyncio.Queue] = None) -> List[Dict]:
         """Translate grouped segments as whole units for better context"""
         try:
-            translated_groups = []
+            groups = [group for group in grouped_segments if group["text"].strip()]
+            
+            # Use timing-aware translation for the grouped text
+            segment_dicts = [
+                {
+                    "start": group["start_time"],
+                    "end": group["end_time"],
+                    "text": group["text"].strip(),
+                    "original_duration": group["end_time"] - group["start_time"]
+                }
+                for group in groups
+            ]
             
-            for i, group in enumerate(grouped_segments):
-                if not group["text"].strip():
-                    continue
-                
+            # Embed every group text in one request up front for the semantic translation cache
+            await self.translator.prefetch_embeddings([segment["text"] for segment in segment_dicts])
+            
+            async def translate_chunk(start: int):
+                # One call per translator batch, so each batch is one GPT request
+                chunk_groups = groups[start:start + TRANSLATION_BATCH_SIZE]
                 try:
-                    print(f"DEBUG: Translating group {i} (Speaker {group['speaker_id']}):")
-                    print(f"  Original: {group['text']}")
-                    
-                    # Use timing-aware translation for the grouped text
-                    segment_dict = {
-                        "start": group["start_time"],
-                        "end": group["end_time"],
-                        "text": group["text"].strip(),
-                        "original_duration": group["end_time"] - group["start_time"]
-                    }
-                    
-                    print(f"DEBUG: Calling timing-aware translation for group {i}:")
-                    print(f"  Duration: {group['end_time'] - group['start_time']:.1f}s")
-                    print(f"  Text length: {len(group['text'].strip())} chars")
-                    
                     translated_segments = await self.translator.translate_segments(
-                        [segment_dict], target_language, timing_aware=True
+                        segment_dicts[start:start + TRANSLATION_BATCH_SIZE], target_language, timing_aware=True
                     )
-                    
-                    if translated_segments and len(translated_segments) > 0:
-                        translated_text = translated_segments[0].get("translated_text", group["text"])
-                        group["translated_text"] = translated_text
-                        print(f"  Translated: {translated_text}")
+                except Exception as e:
+                    logger.warning("Error translating groups %s-%s: %s", start, start + len(chunk_groups) - 1, e)
+                    translated_segments = []
+                
+                for i, group in enumerate(chunk_groups):
+                    if i < len(translated_segments):
+                        group["translated_text"] = translated_segments[i].get("translated_text", group["text"])
                     else:
-                        # Fallback to simple translation
-                        translated_text = await self.translator.translate(group["text"].strip(), target_language)
-                        group["translated_text"] = translated_text
-                        print(f"  Fallback Translated: {translated_text}")
+                        # Keep original text as fallback
+                        group["translated_text"] = group["text"]
+                    logger.debug("Group %s (Speaker %s): %s -> %s", start + i, group['speaker_id'], group['text'], group["translated_text"])
                     
-                    print(f"  ---")
-                    translated_groups.append(group)
-                    
-                except Exception as e:
-                    print(f"DEBUG: Error translating group {i}: {e}")
-                    # Keep original text as fallback
-                    group["translated_text"] = group["text"]
-                    translated_groups.append(group)
+                    # Hand the group to the TTS workers so synthesis overlaps the remaining batches
+                    if speech_queue is not None:
+                        speech_queue.put_nowait(group)
             
-            return translated_groups
+            await asyncio.gather(*[translate_chunk(start) for start in range(0, len(groups), TRANSLATION_BATCH_SIZE)])
+            
+            return groups
             
         except Exception as e:
-            print(f"DEBUG: Error in group translation: {e}")
+            logger.warning("Error in group translation: %s", e)
             return grouped_segments
     
     async def _generate_ai_speech(self, segments: List[SpeakerSegment], target_language: str, job_id: str, timing_aware: bool = True) -> str:
         """Generate AI-enhanced speech with speaker-specific voices and timing"""
         try:
-            print(f"DEBUG: Starting AI speech generation with per-speaker voices (timing_aware: {timing_aware})")
+            logger.debug("Starting AI speech generation with per-speaker voices (timing_aware: %s)", timing_aware)
             
             # Create output directory
             output_dir = os.path.join(os.getenv("OUTPUT_DIR", "./outputs"), job_id)
-            os.makedirs(output_dir, exist_ok=True)
+            ensure_dir(output_dir)
             
             if timing_aware:
                 # Use timing-aware speech generation with speed adjustment
@@ -965,7 +1036,7 @@ class AIDubber:
             speaker_audio_files = {}
             
             for speaker_id, speaker_segments_list in speaker_segments.items():
-                print(f"DEBUG: Generating audio for speaker {speaker_id}")
+                logger.debug("Generating audio for speaker %s", speaker_id)
                 
                 # Combine all text for this speaker
                 speaker_text = " ".join([seg.text for seg in speaker_segments_list if seg.text.strip()])
@@ -974,15 +1045,15 @@ class AIDubber:
                 avg_characteristics = {}
                 if speaker_segments_list and speaker_segments_list[0].voice_characteristics:
                     avg_characteristics = speaker_segments_list[0].voice_characteristics
-                    print(f"DEBUG: Speaker {speaker_id} - Pitch: {avg_characteristics.get('pitch_mean', 0):.1f}Hz, "
-                          f"Energy: {avg_characteristics.get('energy_mean', 0):.3f}, "
-                          f"Spectral: {avg_characteristics.get('spectral_centroid_mean', 0):.1f}Hz")
+                    logger.debug("Speaker %s - Pitch: %.1fHz, Energy: %.3f, Spectral: %.1fHz",
+                                 speaker_id, avg_characteristics.get('pitch_mean', 0), avg_characteristics.get('energy_mean', 0),
+                                 avg_characteristics.get('spectral_centroid_mean', 0))
                 
                 # Get the matched voice ID for this speaker
                 matched_voice_id = None
                 if speaker_segments_list and speaker_segments_list[0].matched_voice_id:
                     matched_voice_id = speaker_segments_list[0].matched_voice_id
-                    print(f"DEBUG: Using matched voice ID: {matched_voice_id} for speaker {speaker_id}")
+                    logger.debug("Using matched voice ID: %s for speaker %s", matched_voice_id, speaker_id)
                 
                 # Generate speech for this speaker using matched voice
                 speaker_audio_path = await self.tts_service.generate_speech(
@@ -999,7 +1070,7 @@ class AIDubber:
             # This will avoid the audio distortion issue
             final_audio_path = await self._combine_speaker_audio_simple(speaker_audio_files, output_dir)
             
-            print(f"DEBUG: AI dubbing completed successfully")
+            logger.debug("AI dubbing completed successfully")
             return final_audio_path
             
         except Exception as e:
@@ -1008,7 +1079,7 @@ class AIDubber:
     async def _generate_timing_aware_speech(self, segments: List[SpeakerSegment], target_language: str, job_id: str, output_dir: str) -> str:
         """Generate timing-aware speech with speed adjustment"""
         try:
-            print(f"DEBUG: Starting timing-aware speech generation")
+            logger.debug("Starting timing-aware speech generation")
             
             # Use the stored translated groups directly instead of re-grouping segments
             if hasattr(self, 'translated_groups') and self.translated_groups:
@@ -1025,18 +1096,18 @@ class AIDubber:
                             "group_id": group["group_id"],
                             "matched_voice_id": group.get("matched_voice_id")
                         })
-                        print(f"DEBUG: Using translated group {i}:")
-                        print(f"  Speaker: {group['speaker_id']}")
-                        print(f"  Voice: {group.get('matched_voice_name', 'Not assigned')} ({group.get('matched_voice_id', 'None')})")
-                        print(f"  Timing: {group['start_time']:.1f}s - {group['end_time']:.1f}s")
-                        print(f"  Duration: {group['end_time'] - group['start_time']:.1f}s")
-                        print(f"  Full Text: {group['translated_text']}")
-                        print(f"  ---")
+                        logger.debug("Using translated group %s:", i)
+                        logger.debug("  Speaker: %s", group['speaker_id'])
+                        logger.debug("  Voice: %s (%s)", group.get('matched_voice_name', 'Not assigned'), group.get('matched_voice_id', 'None'))
+                        logger.debug("  Timing: %.1fs - %.1fs", group['start_time'], group['end_time'])
+                        logger.debug("  Duration: %.1fs", group['end_time'] - group['start_time'])
+                        logger.debug("  Full Text: %s", group['translated_text'])
+                        logger.debug("  ---")
                 
-                print(f"DEBUG: Using {len(group_dicts)} translated groups for TTS")
+                logger.debug("Using %s translated groups for TTS", len(group_dicts))
             else:
                 # Fallback to segment-based approach
-                print(f"DEBUG: No translated groups found, falling back to segment-based approach")
+                logger.debug("No translated groups found, falling back to segment-based approach")
                 group_segments = {}
                 for segment in segments:
                     if segment.group_id:
@@ -1063,7 +1134,7 @@ class AIDubber:
             
             # Check if we have any groups to process
             if not group_dicts:
-                print("DEBUG: No valid groups found for timing-aware speech generation")
+                logger.debug("No valid groups found for timing-aware speech generation")
                 # Create a fallback audio file
                 fallback_path = os.path.join(output_dir, "dubbed_audio.mp3")
                 from pydub import AudioSegment
@@ -1071,18 +1142,18 @@ class AIDubber:
                 silent_audio.export(fallback_path, format="mp3")
                 return fallback_path
             
-            print(f"DEBUG: Processing {len(group_dicts)} groups for timing-aware speech")
+            logger.debug("Processing %s groups for timing-aware speech", len(group_dicts))
             
             # Use TTS service with timing and speed adjustment
             dubbed_audio_path = await self.tts_service.generate_speech_with_timing(
                 group_dicts, target_language, job_id, adjust_speed=True
             )
             
-            print(f"DEBUG: Timing-aware AI dubbing completed successfully")
+            logger.debug("Timing-aware AI dubbing completed successfully")
             return dubbed_audio_path
             
         except Exception as e:
-            print(f"DEBUG: Timing-aware speech generation failed: {str(e)}")
+            logger.warning("Timing-aware speech generation failed: %s", e)
             # Create a fallback audio file
             fallback_path = os.path.join(output_dir, "dubbed_audio.mp3")
             from pydub import AudioSegment
@@ -1093,9 +1164,7 @@ class AIDubber:
     async def _combine_speaker_audio_simple(self, speaker_audio_files: Dict, output_dir: str) -> str:
         """Simple audio combination without complex timestamp alignment"""
         try:
-            import ffmpeg
-            
-            print(f"DEBUG: Combining speaker audio files")
+            logger.debug("Combining speaker audio files")
             
             # Create a simple concatenation of all speaker audio files
             output_path = os.path.join(output_dir, "dubbed_audio_combined.wav")
@@ -1103,42 +1172,55 @@ class AIDubber:
             # Get all audio file paths
             audio_paths = [data['path'] for data in speaker_audio_files.values()]
             
-            if len(audio_paths) == 1:
-                # If only one speaker, just copy the file
-                import shutil
-                shutil.copy2(audio_paths[0], output_path)
-            else:
-                # Combine multiple audio files with ffmpeg
-                input_files = []
-                for audio_path in audio_paths:
-                    input_files.append(ffmpeg.input(audio_path))
-                
-                # Concatenate with a small gap between speakers
-                stream = ffmpeg.concat(*input_files, v=0, a=1)
-                stream = ffmpeg.output(stream, output_path)
-                ffmpeg.run(stream, overwrite_output=True)
+            # Decode and concatenate in-process instead of spawning ffmpeg
+            mixed, sample_rate = await asyncio.to_thread(self._mix_audio_files_sync, audio_paths, None)
+            sf.write(output_path, mixed, sample_rate, subtype='PCM_16')
             
-            print(f"DEBUG: Combined audio created: {output_path}")
+            logger.debug("Combined audio created: %s", output_path)
             return output_path
             
         except Exception as e:
             raise Exception(f"Audio combination failed: {str(e)}")
 
+    def _mix_audio_files_sync(self, audio_paths: List[str], start_times: Optional[List[float]] = None, sample_rate: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """Decode audio files once and mix them at their start times (or back to back) in one float32 buffer"""
+        clips = []
+        for path in audio_paths:
+            data, sr = sf.read(path, dtype='float32')
+            if data.ndim > 1:
+                data = data.mean(axis=1)
+            # Keep the first clip's native rate; only clips that differ from it are resampled
+            if sample_rate is None:
+                sample_rate = sr
+            elif sr != sample_rate:
+                data = librosa.resample(data, orig_sr=sr, target_sr=sample_rate)
+            clips.append(np.ascontiguousarray(data, dtype=np.float32))
+        
+        if not clips:
+            sample_rate = sample_rate or 24000
+            return np.zeros(sample_rate, dtype=np.float32), sample_rate
+        
+        if start_times is None:
+            return np.concatenate(clips), sample_rate
+        
+        starts = [max(int(start * sample_rate), 0) for start in start_times]
+        buffer = np.zeros(max(start + len(clip) for start, clip in zip(starts, clips)), dtype=np.float32)
+        for start, clip in zip(starts, clips):
+            buffer[start:start + len(clip)] += clip
+        
+        return np.clip(buffer, -1.0, 1.0), sample_rate
+
     async def _create_timestamp_aligned_audio(self, segments: List[SpeakerSegment], speaker_audio_files: Dict, output_dir: str, job_id: str) -> str:
         """Create timestamp-aligned audio that matches original dialogue timing"""
         try:
-            import ffmpeg
-            import soundfile as sf
-            import numpy as np
-            
-            print(f"DEBUG: Creating timestamp-aligned audio")
+            logger.debug("Creating timestamp-aligned audio")
             
             # Get the total duration from the last segment
             total_duration = max([seg.end_time for seg in segments]) if segments else 10.0
             
             # Create a silent audio track of the total duration
             sample_rate = 22050  # Standard sample rate
-            silent_audio = np.zeros(int(total_duration * sample_rate))
+            silent_audio = np.zeros(int(total_duration * sample_rate), dtype=np.float32)
             
             # For each segment, insert the corresponding speaker audio at the right timestamp
             for segment in segments:
@@ -1146,7 +1228,7 @@ class AIDubber:
                     speaker_data = speaker_audio_files[segment.speaker_id]
                     
                     # Load the speaker's audio
-                    speaker_audio, sr = sf.read(speaker_data['path'])
+                    speaker_audio, sr = sf.read(speaker_data['path'], dtype='float32')
                     
                     # Resample if needed
                     if sr != sample_rate:
@@ -1182,7 +1264,7 @@ class AIDubber:
                             segment_audio = segment_audio[:segment_duration_samples]
                         elif len(segment_audio) < segment_duration_samples:
                             # Pad with silence
-                            padding = np.zeros(segment_duration_samples - len(segment_audio))
+                            padding = np.zeros(segment_duration_samples - len(segment_audio), dtype=np.float32)
                             segment_audio = np.concatenate([segment_audio, padding])
                         
                         # Insert into the main audio track
@@ -1191,9 +1273,9 @@ class AIDubber:
             
             # Save the timestamp-aligned audio
             output_path = os.path.join(output_dir, "dubbed_audio_timestamped.wav")
-            sf.write(output_path, silent_audio, sample_rate)
+            sf.write(output_path, silent_audio, sample_rate, subtype='PCM_16')
             
-            print(f"DEBUG: Timestamp-aligned audio created: {output_path}")
+            logger.debug("Timestamp-aligned audio created: %s", output_path)
             return output_path
             
         except Exception as e:
@@ -1202,21 +1284,16 @@ class AIDubber:
     async def _combine_ai_audio_segments(self, audio_files: List[Dict], output_dir: str) -> str:
         """Combine AI-generated audio segments with timing preservation"""
         try:
-            import ffmpeg
-            
-            # Create a more sophisticated audio combination
-            output_path = os.path.join(output_dir, "dubbed_audio_ai.mp3")
+            output_path = os.path.join(output_dir, "dubbed_audio_ai.wav")
             
-            # For now, use simple concatenation
-            # In production, you'd implement proper timing gaps and overlaps
-            input_files = []
-            for audio_file in audio_files:
-                input_files.append(ffmpeg.input(audio_file['path']))
+            # Place each clip at its original start time when known, otherwise concatenate
+            audio_paths = [audio_file['path'] for audio_file in audio_files]
+            start_times = None
+            if audio_files and all('start_time' in audio_file for audio_file in audio_files):
+                start_times = [audio_file['start_time'] for audio_file in audio_files]
             
-            # Concatenate with proper timing
-            stream = ffmpeg.concat(*input_files, v=0, a=1)
-            stream = ffmpeg.output(stream, output_path)
-            ffmpeg.run(stream, overwrite_output=True)
+            mixed, sample_rate = await asyncio.to_thread(self._mix_audio_files_sync, audio_paths, start_times)
+            sf.write(output_path, mixed, sample_rate, subtype='PCM_16')
             
             return output_path
             
@@ -1254,5 +1331,5 @@ class AIDubber:
             return summary
             
         except Exception as e:
-            print(f"Analysis summary error: {e}")
+            logger.warning("Analysis summary error: %s", e)
             return {} 
\ No newline at end of file
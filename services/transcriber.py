@@ -1,25 +1,166 @@
 import os
 import asyncio
-import whisper
-from typing import Optional, List, Dict
+import logging
+import shutil
+import threading
+import numpy as np
+import soundfile as sf
+import ctranslate2
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+from typing import Optional, List, Dict, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Silero VAD settings: pauses of half a second or more are dropped before decoding
+WHISPER_VAD_PARAMETERS = {"min_silence_duration_ms": 500}
+
+WHISPER_LANGUAGES = (
+    "af", "am", "ar", "as", "az", "ba", "be", "bg", "bn", "bo", "br", "bs", "ca", "cs", "cy", "da", "de", "el", "en", "es", "et", "eu", "fa", "fi", "fo", "fr", "gl", "gu", "ha", "he", "hi", "hr", "ht", "hu", "hy", "id", "is", "it", "ja", "jw", "ka", "kk", "km", "kn", "ko", "la", "lb", "ln", "lo", "lt", "lv", "mg", "mi", "mk", "ml", "mn", "mr", "ms", "mt", "my", "ne", "nl", "nn", "no", "oc", "pa", "pl", "ps", "pt", "ro", "ru", "sa", "sd", "si", "sk", "sl", "sn", "so", "sq", "sr", "su", "sv", "sw", "ta", "te", "tg", "th", "tk", "tl", "tr", "tt", "uk", "ur", "uz", "vi", "yi", "yo", "zh"
+)
 
 class Transcriber:
     def __init__(self):
         self.model_name = os.getenv("WHISPER_MODEL", "base")
-        self.device = os.getenv("WHISPER_DEVICE", "cpu")
+        self.device = os.getenv("WHISPER_DEVICE") or ("cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu")
+        self.cpu_threads = int(os.getenv("WHISPER_THREADS") or os.cpu_count() or 4)
+        # int8 weights cut memory traffic per matmul; on CUDA keep activations in float16
+        default_compute_type = "int8_float16" if self.device == "cuda" else "int8"
+        self.compute_type = os.getenv("WHISPER_COMPUTE_TYPE") or default_compute_type
+        # Optional English-only checkpoint (e.g. distil-large-v2) used when the source is known to be English
+        self.english_model_name = os.getenv("WHISPER_ENGLISH_MODEL", "")
         self.model = None
-        self._load_model()
+        self._extra_models: Dict[Tuple[str, str], WhisperModel] = {}
+        self._models_lock = threading.Lock()
+        # Chunks of one file decoded together per encoder pass; 1 keeps plain sequential decoding
+        self.batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+        self._batched_pipelines: Dict[int, BatchedInferencePipeline] = {}
+        # Converted, pre-quantized CTranslate2 models are kept here so later starts just load them
+        self.ct2_cache_dir = os.path.expanduser(os.getenv("WHISPER_CT2_CACHE_DIR", "~/.cache/ai-dub/ct2"))
+        # The model is loaded on first use unless a deployment wants the latency paid at startup
+        if os.getenv("WHISPER_PRELOAD", "False").lower() == "true":
+            self._load_model()
     
     def _load_model(self):
         """Load the Whisper model"""
         try:
-            print(f"Loading Whisper model: {self.model_name}")
-            self.model = whisper.load_model(self.model_name, device=self.device)
-            print("Whisper model loaded successfully")
+            logger.debug("Loading Whisper model: %s (%s)", self.model_name, self.compute_type)
+            self.model = self._create_model(self.model_name, self.compute_type)
+            self._warm_up(self.model)
+            logger.debug("Whisper model loaded successfully")
         except Exception as e:
-            print(f"Error loading Whisper model: {e}")
+            logger.warning("Error loading Whisper model: %s", e)
             # Fallback to base model
-            self.model = whisper.load_model("base", device=self.device)
+            self.model = WhisperModel(
+                "base", device=self.device, compute_type=self.compute_type, cpu_threads=self.cpu_threads
+            )
+    
+    def _warm_up(self, model: WhisperModel):
+        """Run one second of silence through the model so the first job doesn't pay kernel setup costs"""
+        try:
+            segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en", beam_size=1)
+            list(segments)
+        except Exception as e:
+            logger.warning("Whisper warm-up failed: %s", e)
+    
+    def _create_model(self, model_name: str, compute_type: str) -> WhisperModel:
+        """Build a WhisperModel, preferring a cached pre-quantized conversion"""
+        model_dir = self._ensure_converted_model(model_name, compute_type)
+        if model_dir:
+            return WhisperModel(
+                model_dir, device=self.device, compute_type=compute_type,
+                cpu_threads=self.cpu_threads, local_files_only=True
+            )
+        return WhisperModel(model_name, device=self.device, compute_type=compute_type, cpu_threads=self.cpu_threads)
+    
+    def _ensure_converted_model(self, model_name: str, compute_type: str) -> Optional[str]:
+        """Convert and quantize a Whisper checkpoint to CTranslate2 once, returning its cached directory"""
+        if os.path.isdir(model_name):
+            return None
+        
+        model_dir = os.path.join(self.ct2_cache_dir, f"{model_name}-{compute_type}")
+        if os.path.exists(os.path.join(model_dir, "model.bin")):
+            return model_dir
+        
+        try:
+            from ctranslate2.converters import TransformersConverter
+            
+            repo_id = f"distil-whisper/{model_name}" if model_name.startswith("distil-") else f"openai/whisper-{model_name}"
+            # Downloads the full fp32 checkpoint once; set WHISPER_PRELOAD=True to pay for it at startup instead of on the first job
+            logger.warning("Converting %s to CTranslate2 (%s), this only happens once", repo_id, compute_type)
+            
+            # Convert into a scratch directory and rename so a crash never leaves a half-written model
+            tmp_dir = f"{model_dir}.{os.getpid()}.tmp"
+            converter = TransformersConverter(repo_id, copy_files=["tokenizer.json", "preprocessor_config.json"])
+            converter.convert(tmp_dir, quantization=compute_type, force=True)
+            os.replace(tmp_dir, model_dir)
+            return model_dir
+        except Exception as e:
+            logger.warning("Could not cache converted Whisper model, loading %s directly: %s", model_name, e)
+            shutil.rmtree(f"{model_dir}.{os.getpid()}.tmp", ignore_errors=True)
+            return None
+    
+    def _load_audio(self, audio_path: str) -> np.ndarray:
+        """Decode audio to 16 kHz mono float32"""
+        # extract_audio already writes 16 kHz mono PCM, which needs no decode or resample pass
+        info = sf.info(audio_path) if audio_path.lower().endswith(".wav") else None
+        if info and info.samplerate == 16000 and info.channels == 1:
+            audio, _ = sf.read(audio_path, dtype='float32')
+        else:
+            audio = decode_audio(audio_path, sampling_rate=16000)
+        return audio
+    
+    def _run_model(self, audio_path: str, source_language: Optional[str] = None, word_timestamps: bool = False):
+        """Start transcription, batching VAD chunks through the encoder when WHISPER_BATCH_SIZE > 1"""
+        model = self._get_model(source_language)
+        options = {
+            "language": source_language if source_language else None,
+            "task": "transcribe",
+            "word_timestamps": word_timestamps,
+            "vad_filter": True,
+            "vad_parameters": WHISPER_VAD_PARAMETERS,
+            "beam_size": 1,
+        }
+        
+        if self.batch_size > 1:
+            with self._models_lock:
+                pipeline = self._batched_pipelines.get(id(model))
+                if pipeline is None:
+                    pipeline = self._batched_pipelines[id(model)] = BatchedInferencePipeline(model=model)
+            segments, _ = pipeline.transcribe(self._load_audio(audio_path), batch_size=self.batch_size, **options)
+        else:
+            # segments is a lazy generator, decoding happens as it is consumed
+            segments, _ = model.transcribe(self._load_audio(audio_path), **options)
+        return segments
+    
+    def _select_model(self, source_language: Optional[str] = None) -> Tuple[str, str]:
+        """Pick the (model name, compute type) to use for a given source language"""
+        # Distilled checkpoints are English-only, so auto-detected audio keeps the multilingual model
+        if self.english_model_name and source_language == "en":
+            return self.english_model_name, self.compute_type
+        return self.model_name, self.compute_type
+    
+    def _get_model(self, source_language: Optional[str] = None) -> WhisperModel:
+        """Return the model for a source language, loading checkpoints on first use"""
+        model_name, compute_type = self._select_model(source_language)
+        if model_name == self.model_name and compute_type == self.compute_type:
+            if self.model is None:
+                with self._models_lock:
+                    if self.model is None:
+                        self._load_model()
+            return self.model
+        
+        with self._models_lock:
+            key = (model_name, compute_type)
+            if key not in self._extra_models:
+                try:
+                    logger.debug("Loading Whisper model: %s (%s)", model_name, compute_type)
+                    self._extra_models[key] = self._create_model(model_name, compute_type)
+                except Exception as e:
+                    logger.warning("Error loading Whisper model %s, using %s: %s", model_name, self.model_name, e)
+                    if self.model is None:
+                        self._load_model()
+                    return self.model
+            return self._extra_models[key]
     
     async def transcribe(self, audio_path: str, source_language: Optional[str] = None) -> str:
         """Transcribe audio file to text"""
@@ -28,10 +169,7 @@ class Transcriber:
                 raise Exception(f"Audio file not found: {audio_path}")
             
             # Run transcription in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, self._transcribe_sync, audio_path, source_language
-            )
+            result = await asyncio.to_thread(self._transcribe_sync, audio_path, source_language)
             
             return result
             
@@ -41,18 +179,11 @@ class Transcriber:
     def _transcribe_sync(self, audio_path: str, source_language: Optional[str] = None) -> str:
         """Synchronous transcription using Whisper"""
         try:
-            # Configure transcription options
-            options = {
-                "language": source_language if source_language else None,
-                "task": "transcribe",
-                "verbose": False,
-            }
-            
             # Transcribe the audio
-            result = self.model.transcribe(audio_path, **options)
+            segments = self._run_model(audio_path, source_language)
             
             # Extract the transcribed text
-            transcribed_text = result.get("text", "").strip()
+            transcribed_text = "".join(segment.text for segment in segments).strip()
             
             if not transcribed_text:
                 raise Exception("No text was transcribed from the audio")
@@ -69,10 +200,7 @@ class Transcriber:
                 raise Exception(f"Audio file not found: {audio_path}")
             
             # Run transcription in executor
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, self._transcribe_with_timestamps_sync, audio_path, source_language
-            )
+            result = await asyncio.to_thread(self._transcribe_with_timestamps_sync, audio_path, source_language)
             
             return result
             
@@ -82,37 +210,26 @@ class Transcriber:
     def _transcribe_with_timestamps_sync(self, audio_path: str, source_language: Optional[str] = None) -> List[Dict]:
         """Synchronous transcription with timestamps"""
         try:
-            # Configure transcription options
-            options = {
-                "language": source_language if source_language else None,
-                "task": "transcribe",
-                "verbose": False,
-                "word_timestamps": True,
-            }
-            
-            # Transcribe the audio
-            result = self.model.transcribe(audio_path, **options)
-            
-            # Extract segments with timestamps
-            segments = result.get("segments", [])
-            
-            # Format segments for easier processing
-            formatted_segments = []
-            for segment in segments:
-                formatted_segments.append({
-                    "start": segment.get("start", 0),
-                    "end": segment.get("end", 0),
-                    "text": segment.get("text", "").strip(),
-                    "words": segment.get("words", [])
-                })
-            
-            return formatted_segments
-            
+            return list(self._iter_segments(audio_path, source_language))
         except Exception as e:
             raise Exception(f"Whisper transcription with timestamps error: {str(e)}")
     
-    def get_supported_languages(self) -> List[str]:
+    def _iter_segments(self, audio_path: str, source_language: Optional[str] = None) -> Iterator[Dict]:
+        """Lazily decode segments with word timestamps, one formatted dict at a time"""
+        segments = self._run_model(audio_path, source_language, word_timestamps=True)
+        
+        # Format segments in the same shape openai-whisper produced so callers are unchanged
+        for segment in segments:
+            yield {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+                "words": [
+                    {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                    for word in (segment.words or [])
+                ]
+            }
+    
+    def get_supported_languages(self) -> Tuple[str, ...]:
         """Get list of supported languages for Whisper"""
-        return [
-            "af", "am", "ar", "as", "az", "ba", "be", "bg", "bn", "bo", "br", "bs", "ca", "cs", "cy", "da", "de", "el", "en", "es", "et", "eu", "fa", "fi", "fo", "fr", "gl", "gu", "ha", "he", "hi", "hr", "ht", "hu", "hy", "id", "is", "it", "ja", "jw", "ka", "kk", "km", "kn", "ko", "la", "lb", "ln", "lo", "lt", "lv", "mg", "mi", "mk", "ml", "mn", "mr", "ms", "mt", "my", "ne", "nl", "nn", "no", "oc", "pa", "pl", "ps", "pt", "ro", "ru", "sa", "sd", "si", "sk", "sl", "sn", "so", "sq", "sr", "su", "sv", "sw", "ta", "te", "tg", "th", "tk", "tl", "tr", "tt", "uk", "ur", "uz", "vi", "yi", "yo", "zh"
-        ] 
\ No newline at end of file
+        return WHISPER_LANGUAGES
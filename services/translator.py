@@ -1,13 +1,342 @@
 import os
+import json
 import asyncio
-from typing import Optional
+import hashlib
+import logging
+import re
+import httpx
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
+from utils.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+# Average speaking rate of 150 words per minute, as words per second
+WORDS_PER_SECOND = 150 / 60.0
+
+GOOGLE_TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+
+# Language name mapping
+LANGUAGE_NAMES = {
+    "es": "Spanish", "fr": "French", "de": "German", "it": "Italian",
+    "pt": "Portuguese", "ru": "Russian", "ja": "Japanese", "ko": "Korean",
+    "zh": "Chinese", "hi": "Hindi", "ar": "Arabic", "nl": "Dutch",
+    "sv": "Swedish", "no": "Norwegian", "da": "Danish", "fi": "Finnish"
+}
+
+# Languages offered for translation, built once at import
+SUPPORTED_LANGUAGES = {
+    "af": "Afrikaans",
+    "sq": "Albanian",
+    "am": "Amharic",
+    "ar": "Arabic",
+    "hy": "Armenian",
+    "az": "Azerbaijani",
+    "eu": "Basque",
+    "be": "Belarusian",
+    "bn": "Bengali",
+    "bs": "Bosnian",
+    "bg": "Bulgarian",
+    "ca": "Catalan",
+    "ceb": "Cebuano",
+    "zh": "Chinese (Simplified)",
+    "zh-tw": "Chinese (Traditional)",
+    "co": "Corsican",
+    "hr": "Croatian",
+    "cs": "Czech",
+    "da": "Danish",
+    "nl": "Dutch",
+    "en": "English",
+    "eo": "Esperanto",
+    "et": "Estonian",
+    "fi": "Finnish",
+    "fr": "French",
+    "fy": "Frisian",
+    "gl": "Galician",
+    "ka": "Georgian",
+    "de": "German",
+    "el": "Greek",
+    "gu": "Gujarati",
+    "ht": "Haitian Creole",
+    "ha": "Hausa",
+    "haw": "Hawaiian",
+    "he": "Hebrew",
+    "hi": "Hindi",
+    "hmn": "Hmong",
+    "hu": "Hungarian",
+    "is": "Icelandic",
+    "ig": "Igbo",
+    "id": "Indonesian",
+    "ga": "Irish",
+    "it": "Italian",
+    "ja": "Japanese",
+    "jv": "Javanese",
+    "kn": "Kannada",
+    "kk": "Kazakh",
+    "km": "Khmer",
+    "ko": "Korean",
+    "ku": "Kurdish",
+    "ky": "Kyrgyz",
+    "lo": "Lao",
+    "la": "Latin",
+    "lv": "Latvian",
+    "lt": "Lithuanian",
+    "lb": "Luxembourgish",
+    "mk": "Macedonian",
+    "mg": "Malagasy",
+    "ms": "Malay",
+    "ml": "Malayalam",
+    "mt": "Maltese",
+    "mi": "Maori",
+    "mr": "Marathi",
+    "mn": "Mongolian",
+    "my": "Myanmar (Burmese)",
+    "ne": "Nepali",
+    "no": "Norwegian",
+    "ny": "Nyanja (Chichewa)",
+    "or": "Odia (Oriya)",
+    "ps": "Pashto",
+    "fa": "Persian",
+    "pl": "Polish",
+    "pt": "Portuguese",
+    "pa": "Punjabi",
+    "ro": "Romanian",
+    "ru": "Russian",
+    "sm": "Samoan",
+    "gd": "Scots Gaelic",
+    "sr": "Serbian",
+    "st": "Sesotho",
+    "sn": "Shona",
+    "sd": "Sindhi",
+    "si": "Sinhala (Sinhalese)",
+    "sk": "Slovak",
+    "sl": "Slovenian",
+    "so": "Somali",
+    "es": "Spanish",
+    "su": "Sundanese",
+    "sw": "Swahili",
+    "sv": "Swedish",
+    "tl": "Tagalog (Filipino)",
+    "tg": "Tajik",
+    "ta": "Tamil",
+    "tt": "Tatar",
+    "te": "Telugu",
+    "th": "Thai",
+    "tr": "Turkish",
+    "tk": "Turkmen",
+    "uk": "Ukrainian",
+    "ur": "Urdu",
+    "ug": "Uyghur",
+    "uz": "Uzbek",
+    "vi": "Vietnamese",
+    "cy": "Welsh",
+    "xh": "Xhosa",
+    "yi": "Yiddish",
+    "yo": "Yoruba",
+    "zu": "Zulu"
+}
+
+SUPPORTED_LANGUAGE_CODES = frozenset(SUPPORTED_LANGUAGES)
+
+# Kept byte-identical across requests so OpenAI's prompt cache can reuse the prefix;
+# everything that varies per segment goes in the user message.
+TRANSLATION_SYSTEM_PROMPT = """You are a professional translator specializing in timing-aware translations for dubbing.
+
+Translate the text you are given to the requested target language, maintaining similar length and speaking duration.
+
+CRITICAL REQUIREMENTS:
+- Target word count: stay within ±10% of the target word count you are given
+- COMPLETE TRANSLATION: Translate the ENTIRE text, do not cut off or truncate
+- Preserve the meaning and intent
+- MATCH THE VIBE: Analyze the original text's tone and style, then match it in translation
+
+TONE MATCHING:
+- If original is poetic/emotional → Make translation poetic/emotional
+- If original is formal/official → Make translation formal/official
+- If original is casual/conversational → Make translation casual/conversational
+- If original is technical/professional → Make translation technical/professional
+- If original is dramatic/intense → Make translation dramatic/intense
+- If original is humorous/light → Make translation humorous/light
+
+LANGUAGE STYLE (adapt based on original tone):
+- For Hindi: Use natural Hindi-Urdu mix with some English words, like "main office ja raha hun" or "yeh kaam bahut mushkil hai" not pure Hindi "मैं कार्यालय जा रहा हूँ"
+- For Spanish: Use casual, everyday Spanish, not formal academic Spanish
+- For French: Use conversational French, avoid overly formal constructions
+- For German: Use natural spoken German, not formal written German
+- For all languages: Use contractions, informal expressions, and natural speech patterns
+
+LENGTH CONTROL:
+- If original is longer: Condense while keeping key information
+- If original is shorter: Expand slightly while maintaining natural flow
+- Count words carefully and stay within target range
+- NEVER truncate or cut off the translation
+
+Important:
+
+Before translating, reflect briefly on the tone, vocabulary, and cultural adaptation needed for natural speech in the target language.
+Translate it as if it's being spoken aloud by a native speaker of the target language for a dubbed video.
+
+IMPORTANT: First analyze the tone/vibe of the original text, then provide a COMPLETE translation that matches that style."""
+
+TRANSLATION_USER_PROMPT = """Target language: {target_lang_name}
+Target word count: {target_word_count} words (±10% tolerance)
+
+Original text: "{text}"
+
+Respond with a JSON object of the form {{"translation": "<{target_lang_name} translation>"}}."""
+
+TRANSLATION_BATCH_USER_PROMPT = """Target language: {target_lang_name}
+
+Translate each item below independently. Each item has its own target word count (±10% tolerance).
+
+Items: {items}
+
+Respond with a JSON object of the form {{"translations": [{{"id": <item id>, "translation": "<{target_lang_name} translation>"}}]}} containing exactly one entry per item."""
+
+# Any letter in any script; text without one (numbers, timestamps, punctuation) needs no translation
+HAS_LETTERS = re.compile(r"[^\W\d_]")
+
+# Characters of source text per batched Google Translate request
+GOOGLE_BATCH_CHARS = 4000
+
+# Hot translations kept in memory in front of the on-disk cache
+MEMORY_CACHE_SIZE = 1024
+
+# Segments per batched GPT call, small enough that the combined output stays well under max_tokens
+TRANSLATION_BATCH_SIZE = 20
 
 class Translator:
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
-        # OpenAI API key is set when needed
-        pass
+        # One shared async client so requests reuse pooled keep-alive connections
+        self._client = None
+        if self.openai_api_key:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(api_key=self.openai_api_key, max_retries=2, timeout=30.0)
+        self.model = os.getenv("OPENAI_TRANSLATION_MODEL", "gpt-4o-mini")
+        # Optional higher-quality model retried when the primary one fails or runs out of tokens
+        self.fallback_model = os.getenv("OPENAI_TRANSLATION_FALLBACK_MODEL", "")
+        # Try plain machine translation first and only pay for GPT when its length is off target
+        self.plain_translation_first = os.getenv("PLAIN_TRANSLATION_FIRST", "False").lower() == "true"
+        
+        # Persistent cache so retried/resumed jobs don't pay for the same GPT call twice
+        self.cache_dir = os.path.join(os.getenv("TEMP_DIR", "./temp"), "translation_cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._memory_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._detected_languages: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Optional embedding-based cache that also catches near-duplicate lines
+        self.semantic_cache = None
+        if os.getenv("SEMANTIC_TRANSLATION_CACHE", "False").lower() == "true":
+            self.semantic_cache = SemanticCache(os.path.join(self.cache_dir, "semantic"))
+        self._embeddings = {}
+        
+        # Google Translate client, created on first use and kept open so requests reuse connections
+        self._http = None
+        
+        # Caps in-flight OpenAI chat requests across all callers to stay within rate limits
+        self._openai_semaphore = asyncio.Semaphore(int(os.getenv("TRANSLATION_CONCURRENCY", "8")))
+    
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        await self.flush_semantic_cache()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._client is not None:
+            await self._client.close()
+    
+    async def flush_semantic_cache(self):
+        """Write new semantic cache entries to disk off the event loop"""
+        if self.semantic_cache:
+            await asyncio.to_thread(self.semantic_cache.flush)
+    
+    async def prefetch_embeddings(self, texts: List[str]):
+        """Embed all texts in one request so semantic cache lookups don't pay per-segment latency"""
+        if not self.semantic_cache or not self._client:
+            return
+        
+        missing = [text for text in dict.fromkeys(texts) if text and text not in self._embeddings]
+        if not missing:
+            return
+        
+        try:
+            response = await self._client.embeddings.create(
+                model="text-embedding-3-small",
+                input=missing
+            )
+            for text, item in zip(missing, response.data):
+                self._embeddings[text] = item.embedding
+        except Exception as e:
+            logger.warning("Error computing embeddings for semantic cache: %s", e)
+    
+    async def _get_embedding(self, text: str):
+        """Get the embedding for a text, computing it if it wasn't prefetched"""
+        if text not in self._embeddings:
+            await self.prefetch_embeddings([text])
+        return self._embeddings.get(text)
+    
+    def _cache_path(self, text: str, target_language: str, target_word_count: int, source_language: Optional[str], model: Optional[str] = None) -> str:
+        """Get the cache file path for a translation request answered by the given model (default: the primary one)"""
+        key_data = json.dumps([text, target_language, target_word_count, source_language, model or self.model])
+        cache_key = hashlib.sha256(key_data.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{cache_key}.json")
+    
+    def _models(self) -> List[str]:
+        """Models to try in order: the primary one, then the fallback if configured"""
+        models = [self.model]
+        if self.fallback_model and self.fallback_model != self.model:
+            models.append(self.fallback_model)
+        return models
+    
+    def _load_any_cached_translation(self, text: str, target_language: str, target_word_count: int, source_language: Optional[str]) -> Optional[str]:
+        """Load a cached translation from any of the models, preferring the primary model's answer"""
+        for model in self._models():
+            cached_translation = self._load_cached_translation(
+                self._cache_path(text, target_language, target_word_count, source_language, model)
+            )
+            if cached_translation:
+                return cached_translation
+        return None
+    
+    def _load_cached_translation(self, cache_path: str) -> Optional[str]:
+        """Load a cached translation if present"""
+        if cache_path in self._memory_cache:
+            self._memory_cache.move_to_end(cache_path)
+            return self._memory_cache[cache_path]
+        try:
+            if os.path.exists(cache_path):
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    translated_text = json.load(f).get("translation")
+                if translated_text:
+                    self._remember_translation(cache_path, translated_text)
+                return translated_text
+        except Exception as e:
+            logger.warning("Error loading cached translation: %s", e)
+        return None
+    
+    def _save_cached_translation(self, cache_path: str, translated_text: str):
+        """Save a translation to the cache"""
+        self._remember_translation(cache_path, translated_text)
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({"translation": translated_text}, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning("Error saving cached translation: %s", e)
+    
+    def _remember_translation(self, cache_path: str, translated_text: str):
+        """Keep a translation in the in-memory LRU, evicting the least recently used entry"""
+        self._memory_cache[cache_path] = translated_text
+        self._memory_cache.move_to_end(cache_path)
+        if len(self._memory_cache) > MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+    
+    def _check_target_language(self, target_language: str):
+        """Reject unsupported target languages before spending any API calls on them"""
+        code = target_language.lower()
+        if code not in SUPPORTED_LANGUAGE_CODES and code.split('-')[0] not in SUPPORTED_LANGUAGE_CODES:
+            raise Exception(f"Unsupported target language: {target_language}")
     
     async def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
         """Translate text to target language"""
@@ -18,8 +347,14 @@ class Translator:
             if not target_language:
                 raise Exception("Target language not specified")
             
-            # Call the async translation method directly
-            translated_text = await self._translate_sync(text, target_language, source_language)
+            self._check_target_language(target_language)
+            
+            # Call the async translation method directly, falling back to Google Translate if GPT fails
+            try:
+                translated_text = await self._translate_sync(text, target_language, source_language)
+            except Exception as e:
+                logger.warning("OpenAI translation failed, using fallback translation: %s", e)
+                translated_text = await self._fallback_translation(text, target_language, source_language)
             
             return translated_text
             
@@ -33,16 +368,13 @@ class Translator:
             original_word_count = len(text.split())
             target_word_count = original_word_count  # Maintain similar word count
             
-            print(f"DEBUG: OpenAI translation request:")
-            print(f"  Original text: {text[:100]}...")
-            print(f"  Original word count: {original_word_count}")
-            print(f"  Target word count: {target_word_count}")
+            logger.debug("OpenAI translation request: %.100s... (%d words, target %d)",
+                         text, original_word_count, target_word_count)
             
             translated_text = await self._gpt_timing_aware_translate(text, target_language, target_word_count, source_language)
             
-            actual_word_count = len(translated_text.split())
-            print(f"  Translated word count: {actual_word_count}")
-            print(f"  Translation: {translated_text[:100]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Translation: %.100s... (%d words)", translated_text, len(translated_text.split()))
             
             return translated_text
             
@@ -52,21 +384,46 @@ class Translator:
     async def translate_segments(self, segments: list, target_language: str, source_language: Optional[str] = None, timing_aware: bool = False) -> list:
         """Translate a list of text segments with timestamps"""
         try:
-            translated_segments = []
+            self._check_target_language(target_language)
             
+            entries = []
             for segment in segments:
                 original_text = segment.get("text", "").strip()
                 if not original_text:
                     continue
                 
-                # Calculate target word count if timing-aware translation is enabled
-                target_word_count = None
-                if timing_aware:
-                    original_duration = segment.get("end", 0) - segment.get("start", 0)
-                    target_word_count = self._calculate_target_word_count(original_duration)
+                start = segment.get("start", 0)
+                end = segment.get("end", 0)
                 
+                # Calculate target word count if timing-aware translation is enabled (always >= 1 when set)
+                target_word_count = self._calculate_target_word_count(end - start) if timing_aware else None
+                
+                entries.append((segment, original_text, target_word_count, start, end))
+            
+            # Translate multiple segments in as few requests as possible
+            batched_translations = {}
+            if not self._client:
+                # Without OpenAI every segment would fall back to Google one request at a time
+                fallback_translations = await self._fallback_translation_batch(
+                    [entry[1] for entry in entries if HAS_LETTERS.search(entry[1])], target_language, source_language
+                )
+                batched_translations = {
+                    (text, word_count): fallback_translations[text]
+                    for _, text, word_count, _, _ in entries if text in fallback_translations
+                }
+            elif timing_aware and len(entries) > 1 and not self.plain_translation_first:
+                batched_translations = await self._batch_translate(
+                    [(text, word_count) for _, text, word_count, _, _ in entries if HAS_LETTERS.search(text)],
+                    target_language, source_language
+                )
+            
+            async def translate_one(segment: dict, original_text: str, target_word_count: Optional[int], start: float, end: float) -> dict:
                 # Translate the text with timing constraints if needed
-                if timing_aware and target_word_count:
+                if not HAS_LETTERS.search(original_text):
+                    translated_text = original_text
+                elif (original_text, target_word_count) in batched_translations:
+                    translated_text = batched_translations[(original_text, target_word_count)]
+                elif target_word_count:
                     translated_text = await self._timing_aware_translate(
                         original_text, target_language, target_word_count, source_language
                     )
@@ -74,33 +431,40 @@ class Translator:
                     translated_text = await self.translate(original_text, target_language, source_language)
                 
                 # Create new segment with translated text
-                translated_segment = {
-                    "start": segment.get("start", 0),
-                    "end": segment.get("end", 0),
+                return {
+                    "start": start,
+                    "end": end,
                     "original_text": original_text,
                     "translated_text": translated_text,
-                    "original_duration": segment.get("end", 0) - segment.get("start", 0),
+                    "original_duration": end - start,
                     "target_word_count": target_word_count,
                     "words": segment.get("words", [])
                 }
-                
-                translated_segments.append(translated_segment)
             
-            return translated_segments
+            # Remaining per-segment requests run concurrently; gather keeps segment order
+            translated_segments = await asyncio.gather(*[translate_one(*entry) for entry in entries])
+            await self.flush_semantic_cache()
+            
+            return list(translated_segments)
             
         except Exception as e:
             raise Exception(f"Segment translation failed: {str(e)}")
     
     def _calculate_target_word_count(self, duration: float) -> int:
         """Calculate target word count based on duration and speaking rate"""
-        # Average speaking rate: 150 words per minute
-        words_per_minute = 150
-        duration_minutes = duration / 60.0
-        target_words = int(duration_minutes * words_per_minute)
-        return max(target_words, 1)
+        return max(int(duration * WORDS_PER_SECOND), 1)
     
     async def _timing_aware_translate(self, text: str, target_language: str, target_word_count: int, source_language: Optional[str] = None) -> str:
         """Use GPT for timing-aware translation"""
+        if self.plain_translation_first or not self._client:
+            try:
+                plain_translation = await self._fallback_translation(text, target_language, source_language)
+                word_count = len(plain_translation.split())
+                if abs(word_count - target_word_count) <= max(2, target_word_count * 0.15) or not self._client:
+                    return plain_translation
+            except Exception as e:
+                logger.warning("Plain translation failed, using GPT: %s", e)
+        
         try:
             return await self._gpt_timing_aware_translate(text, target_language, target_word_count, source_language)
         except Exception as e:
@@ -109,209 +473,237 @@ class Translator:
     async def _gpt_timing_aware_translate(self, text: str, target_language: str, target_word_count: int, source_language: Optional[str] = None) -> str:
         """Use GPT for timing-aware translation"""
         try:
-            import openai
+            models = self._models()
+            
+            # Check the persistent cache before calling the API, preferring the primary model's answer
+            cached_translation = self._load_any_cached_translation(text, target_language, target_word_count, source_language)
+            if cached_translation:
+                return cached_translation
+            
+            # Fall back to a semantic match on near-duplicate lines
+            embedding = None
+            if self.semantic_cache:
+                embedding = await self._get_embedding(text)
+                if embedding is not None:
+                    similar_translation = self.semantic_cache.lookup(embedding, target_language, target_word_count)
+                    if similar_translation:
+                        return similar_translation
             
             # Ensure OpenAI API key is set
-            if not self.openai_api_key:
+            if not self._client:
                 raise Exception("OPENAI_API_KEY environment variable not set")
             
-            openai.api_key = self.openai_api_key
+            target_lang_name = LANGUAGE_NAMES.get(target_language, target_language)
             
-            # Language name mapping
-            language_names = {
-                "es": "Spanish", "fr": "French", "de": "German", "it": "Italian",
-                "pt": "Portuguese", "ru": "Russian", "ja": "Japanese", "ko": "Korean",
-                "zh": "Chinese", "hi": "Hindi", "ar": "Arabic", "nl": "Dutch",
-                "sv": "Swedish", "no": "Norwegian", "da": "Danish", "fi": "Finnish"
-            }
+            prompt = TRANSLATION_USER_PROMPT.format(
+                target_lang_name=target_lang_name,
+                target_word_count=target_word_count,
+                text=text
+            )
             
-            target_lang_name = language_names.get(target_language, target_language)
+            # Size the output budget to the expected translation (with headroom for non-Latin scripts and JSON)
+            max_tokens = min(1000, 64 + target_word_count * 6)
             
-            prompt = f"""
-            Translate the following text to {target_lang_name}, maintaining similar length and speaking duration.
-
-            CRITICAL REQUIREMENTS:
-            - Target word count: {target_word_count} words (±10% tolerance)
-            - COMPLETE TRANSLATION: Translate the ENTIRE text, do not cut off or truncate
-            - Preserve the meaning and intent
-            - MATCH THE VIBE: Analyze the original text's tone and style, then match it in translation
-
-            TONE MATCHING:
-            - If original is poetic/emotional → Make translation poetic/emotional
-            - If original is formal/official → Make translation formal/official  
-            - If original is casual/conversational → Make translation casual/conversational
-            - If original is technical/professional → Make translation technical/professional
-            - If original is dramatic/intense → Make translation dramatic/intense
-            - If original is humorous/light → Make translation humorous/light
-
-            LANGUAGE STYLE (adapt based on original tone):
-            - For Hindi: Use natural Hindi-Urdu mix with some English words, like "main office ja raha hun" or "yeh kaam bahut mushkil hai" not pure Hindi "मैं कार्यालय जा रहा हूँ"
-            - For Spanish: Use casual, everyday Spanish, not formal academic Spanish
-            - For French: Use conversational French, avoid overly formal constructions
-            - For German: Use natural spoken German, not formal written German
-            - For all languages: Use contractions, informal expressions, and natural speech patterns
-
-            LENGTH CONTROL:
-            - If original is longer: Condense while keeping key information
-            - If original is shorter: Expand slightly while maintaining natural flow
-            - Count words carefully and stay within target range
-            - NEVER truncate or cut off the translation
-
-            Original text: "{text}"
-
-            Important:
-
-            Before translating, reflect briefly on the tone, vocabulary, and cultural adaptation needed for natural speech in the target language.
-            Translate it as if it’s being spoken aloud by a native speaker in {target_lang_name} for a dubbed video.
-
-            IMPORTANT: First analyze the tone/vibe of the original text, then provide a COMPLETE translation that matches that style:
-
-            Translation ({target_lang_name}):
-            """
-            
-            from openai import OpenAI
+            for attempt, model in enumerate(models):
+                try:
+                    async with self._openai_semaphore:
+                        response = await self._client.chat.completions.create(
+                            model=model,
+                            messages=[
+                                {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT},
+                                {"role": "user", "content": prompt}
+                            ],
+                            max_tokens=max_tokens,
+                            temperature=0.3,
+                            response_format={"type": "json_object"}
+                        )
+                    if response.choices[0].finish_reason == "length":
+                        raise Exception(f"translation truncated at {max_tokens} tokens")
+                    break
+                except Exception as e:
+                    if attempt == len(models) - 1:
+                        raise
+                    logger.warning("%s translation failed, retrying with %s: %s", model, models[attempt + 1], e)
             
-            client = OpenAI(api_key=self.openai_api_key)
+            translated_text = self._parse_translation_response(response.choices[0].message.content)
             
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a professional translator specializing in timing-aware translations for dubbing."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,  # Increased to ensure complete translations
-                temperature=0.3
+            # Key the cache on the model that actually answered
+            self._save_cached_translation(
+                self._cache_path(text, target_language, target_word_count, source_language, model), translated_text
             )
-            
-            translated_text = response.choices[0].message.content.strip()
-            
-            # Clean up the response
-            import re
-            translated_text = re.sub(r'^["\']|["\']$', '', translated_text)
+            if embedding is not None:
+                self.semantic_cache.add(embedding, target_language, target_word_count, translated_text)
             
             return translated_text
             
         except Exception as e:
             raise Exception(f"GPT timing-aware translation failed: {str(e)}")
     
+    async def _batch_translate(self, items: List[Tuple[str, int]], target_language: str, source_language: Optional[str] = None) -> Dict[Tuple[str, int], str]:
+        """Translate (text, target word count) pairs with one GPT call per batch; anything missing falls back per segment"""
+        translations = {}
+        pending = []
+        for item in dict.fromkeys(items):
+            cached_translation = self._load_any_cached_translation(item[0], target_language, item[1], source_language)
+            if cached_translation:
+                translations[item] = cached_translation
+            else:
+                pending.append(item)
+        
+        # Near-duplicates of earlier lines come from the semantic cache instead of a GPT batch
+        if pending and self.semantic_cache:
+            await self.prefetch_embeddings([text for text, _ in pending])
+            still_pending = []
+            for item in pending:
+                embedding = self._embeddings.get(item[0])
+                similar_translation = self.semantic_cache.lookup(embedding, target_language, item[1]) if embedding is not None else None
+                if similar_translation:
+                    translations[item] = similar_translation
+                else:
+                    still_pending.append(item)
+            pending = still_pending
+        
+        if not pending or not self._client:
+            return translations
+        
+        async def translate_batch(batch: List[Tuple[str, int]]):
+            try:
+                target_lang_name = LANGUAGE_NAMES.get(target_language, target_language)
+                prompt = TRANSLATION_BATCH_USER_PROMPT.format(
+                    target_lang_name=target_lang_name,
+                    items=json.dumps(
+                        [{"id": i, "text": text, "target_words": word_count} for i, (text, word_count) in enumerate(batch)],
+                        ensure_ascii=False
+                    )
+                )
+                
+                async with self._openai_semaphore:
+                    response = await self._client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=4000,
+                        temperature=0.3,
+                        response_format={"type": "json_object"}
+                    )
+                
+                results = json.loads(response.choices[0].message.content)["translations"]
+                for result in results:
+                    i = int(result["id"])
+                    translated_text = str(result["translation"]).strip()
+                    if 0 <= i < len(batch) and translated_text:
+                        translations[batch[i]] = translated_text
+                        self._save_cached_translation(
+                            self._cache_path(batch[i][0], target_language, batch[i][1], source_language), translated_text
+                        )
+                        embedding = self._embeddings.get(batch[i][0]) if self.semantic_cache else None
+                        if embedding is not None:
+                            self.semantic_cache.add(embedding, target_language, batch[i][1], translated_text)
+            except Exception as e:
+                logger.warning("Batched translation failed, falling back to per-segment requests: %s", e)
+        
+        await asyncio.gather(*[
+            translate_batch(pending[start:start + TRANSLATION_BATCH_SIZE])
+            for start in range(0, len(pending), TRANSLATION_BATCH_SIZE)
+        ])
+        return translations
+    
+    def _parse_translation_response(self, content: str) -> str:
+        """Extract the translation from a JSON-mode response"""
+        try:
+            return json.loads(content)["translation"].strip()
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            # Model ignored JSON mode - use the raw text without surrounding quotes
+            return content.strip().strip('"\'')
+    
     def get_supported_languages(self) -> dict:
         """Get list of supported languages for translation"""
-        return {
-            "af": "Afrikaans",
-            "sq": "Albanian",
-            "am": "Amharic",
-            "ar": "Arabic",
-            "hy": "Armenian",
-            "az": "Azerbaijani",
-            "eu": "Basque",
-            "be": "Belarusian",
-            "bn": "Bengali",
-            "bs": "Bosnian",
-            "bg": "Bulgarian",
-            "ca": "Catalan",
-            "ceb": "Cebuano",
-            "zh": "Chinese (Simplified)",
-            "zh-tw": "Chinese (Traditional)",
-            "co": "Corsican",
-            "hr": "Croatian",
-            "cs": "Czech",
-            "da": "Danish",
-            "nl": "Dutch",
-            "en": "English",
-            "eo": "Esperanto",
-            "et": "Estonian",
-            "fi": "Finnish",
-            "fr": "French",
-            "fy": "Frisian",
-            "gl": "Galician",
-            "ka": "Georgian",
-            "de": "German",
-            "el": "Greek",
-            "gu": "Gujarati",
-            "ht": "Haitian Creole",
-            "ha": "Hausa",
-            "haw": "Hawaiian",
-            "he": "Hebrew",
-            "hi": "Hindi",
-            "hmn": "Hmong",
-            "hu": "Hungarian",
-            "is": "Icelandic",
-            "ig": "Igbo",
-            "id": "Indonesian",
-            "ga": "Irish",
-            "it": "Italian",
-            "ja": "Japanese",
-            "jv": "Javanese",
-            "kn": "Kannada",
-            "kk": "Kazakh",
-            "km": "Khmer",
-            "ko": "Korean",
-            "ku": "Kurdish",
-            "ky": "Kyrgyz",
-            "lo": "Lao",
-            "la": "Latin",
-            "lv": "Latvian",
-            "lt": "Lithuanian",
-            "lb": "Luxembourgish",
-            "mk": "Macedonian",
-            "mg": "Malagasy",
-            "ms": "Malay",
-            "ml": "Malayalam",
-            "mt": "Maltese",
-            "mi": "Maori",
-            "mr": "Marathi",
-            "mn": "Mongolian",
-            "my": "Myanmar (Burmese)",
-            "ne": "Nepali",
-            "no": "Norwegian",
-            "ny": "Nyanja (Chichewa)",
-            "or": "Odia (Oriya)",
-            "ps": "Pashto",
-            "fa": "Persian",
-            "pl": "Polish",
-            "pt": "Portuguese",
-            "pa": "Punjabi",
-            "ro": "Romanian",
-            "ru": "Russian",
-            "sm": "Samoan",
-            "gd": "Scots Gaelic",
-            "sr": "Serbian",
-            "st": "Sesotho",
-            "sn": "Shona",
-            "sd": "Sindhi",
-            "si": "Sinhala (Sinhalese)",
-            "sk": "Slovak",
-            "sl": "Slovenian",
-            "so": "Somali",
-            "es": "Spanish",
-            "su": "Sundanese",
-            "sw": "Swahili",
-            "sv": "Swedish",
-            "tl": "Tagalog (Filipino)",
-            "tg": "Tajik",
-            "ta": "Tamil",
-            "tt": "Tatar",
-            "te": "Telugu",
-            "th": "Thai",
-            "tr": "Turkish",
-            "tk": "Turkmen",
-            "uk": "Ukrainian",
-            "ur": "Urdu",
-            "ug": "Uyghur",
-            "uz": "Uzbek",
-            "vi": "Vietnamese",
-            "cy": "Welsh",
-            "xh": "Xhosa",
-            "yi": "Yiddish",
-            "yo": "Yoruba",
-            "zu": "Zulu"
+        return SUPPORTED_LANGUAGES
+    
+    async def _google_translate_request(self, text: str, target_language: str, source_language: Optional[str] = None) -> list:
+        """Call the public Google Translate endpoint with a non-blocking HTTP client"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=600)
+            )
+        
+        params = {
+            "client": "gtx",
+            "sl": source_language or "auto",
+            "tl": target_language,
+            "dt": "t",
+            "q": text
         }
+        response = await self._http.get(GOOGLE_TRANSLATE_URL, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _fallback_translation(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        """Plain (not timing-aware) translation through Google Translate"""
+        try:
+            cache_key = json.dumps(["google", text, target_language, source_language])
+            if cache_key in self._memory_cache:
+                self._memory_cache.move_to_end(cache_key)
+                return self._memory_cache[cache_key]
+            
+            data = await self._google_translate_request(text, target_language, source_language)
+            # data[0] is a list of [translated_chunk, original_chunk, ...] sentences
+            translated_text = "".join(part[0] for part in data[0] if part and part[0])
+            if not translated_text:
+                raise Exception("Empty translation returned")
+            self._remember_translation(cache_key, translated_text)
+            return translated_text
+        except Exception as e:
+            raise Exception(f"Fallback translation failed: {str(e)}")
+    
+    async def _fallback_translation_batch(self, texts: List[str], target_language: str, source_language: Optional[str] = None) -> Dict[str, str]:
+        """Translate many texts through Google with one newline-joined request per chunk"""
+        chunks = []
+        chunk = []
+        chunk_chars = 0
+        for text in dict.fromkeys(texts):
+            # Keep each request's query string comfortably under URL length limits
+            if chunk and chunk_chars + len(text) > GOOGLE_BATCH_CHARS:
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text) + 1
+        if chunk:
+            chunks.append(chunk)
+        
+        translations = {}
+        
+        async def translate_chunk(chunk: List[str]):
+            try:
+                data = await self._google_translate_request(
+                    "\n".join(text.replace("\n", " ") for text in chunk), target_language, source_language
+                )
+                lines = "".join(part[0] for part in data[0] if part and part[0]).split("\n")
+                if len(lines) == len(chunk):
+                    translations.update(
+                        (text, line.strip()) for text, line in zip(chunk, lines) if line.strip()
+                    )
+            except Exception as e:
+                logger.warning("Batched fallback translation failed, translating segments individually: %s", e)
+        
+        await asyncio.gather(*[translate_chunk(chunk) for chunk in chunks])
+        return translations
     
     async def detect_language(self, text: str) -> str:
         """Detect the language of the given text"""
         try:
-            detected = await self.translator.detect(text)
-            return detected.lang
+            if text in self._detected_languages:
+                self._detected_languages.move_to_end(text)
+                return self._detected_languages[text]
+            
+            data = await self._google_translate_request(text, "en")
+            # data[2] holds the detected source language code
+            self._detected_languages[text] = data[2]
+            if len(self._detected_languages) > MEMORY_CACHE_SIZE:
+                self._detected_languages.popitem(last=False)
+            return data[2]
         except Exception as e:
             raise Exception(f"Language detection failed: {str(e)}") 
\ No newline at end of file
@@ -1,20 +1,190 @@
 import os
+import random
+import re
 import asyncio
-import requests
+import functools
+import hashlib
+import json
+import logging
+import shutil
+import subprocess
+import threading
+import time
+import httpx
+import numpy as np
+import librosa
 from typing import Optional
-from elevenlabs import ElevenLabs
-from pydub import AudioSegment
+from concurrent.futures import ThreadPoolExecutor
+from elevenlabs import ElevenLabs, AsyncElevenLabs, Voice
+from utils.fs import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+# Sample rate requested from ElevenLabs for raw PCM output (available on all plans)
+PCM_SAMPLE_RATE = 24000
+
+# Language and gender to voice mapping for ElevenLabs
+VOICE_MAPPING = {
+    "en": {
+        "male": "ErXwobaYiN019PkySvjV",    # Antoni - English (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - English (Female)
+        "unknown": "21m00Tcm4TlvDq8ikWAM"  # Default English voice
+    },
+    "es": {
+        "male": "ErXwobaYiN019PkySvjV",    # Antoni - Spanish (Male)
+        "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - Spanish (Female)
+        "unknown": "ErXwobaYiN019PkySvjV"  # Default Spanish voice
+    },
+    "fr": {
+        "male": "yoZ06aMxZJJ28mfd3POQ",    # Josh - French (Male)
+        "female": "AZnzlk1XvdvUeBnXmlld",  # Domi - French (Female)
+        "unknown": "yoZ06aMxZJJ28mfd3POQ"  # Default French voice
+    },
+    "de": {
+        "male": "AZnzlk1XvdvUeBnXmlld",    # Domi - German (Male)
+        "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - German (Female)
+        "unknown": "AZnzlk1XvdvUeBnXmlld"  # Default German voice
+    },
+    "it": {
+        "male": "ErXwobaYiN019PkySvjV",    # Antoni - Italian (Male)
+        "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - Italian (Female)
+        "unknown": "EXAVITQu4vr4xnSDxMaL"  # Default Italian voice
+    },
+    "pt": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Portuguese (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Portuguese (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Portuguese voice
+    },
+    "ru": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Russian (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Russian (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Russian voice
+    },
+    "ja": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Japanese (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Japanese (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Japanese voice
+    },
+    "ko": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Korean (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Korean (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Korean voice
+    },
+    "zh": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Chinese (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Chinese (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Chinese voice
+    },
+    "hi": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Hindi (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Hindi (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Hindi voice
+    },
+    "ar": {
+        "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Arabic (Male)
+        "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Arabic (Female)
+        "unknown": "VR6AewLTigWG4xSOukaG"  # Default Arabic voice
+    }
+}
+
+# Languages with voices in VOICE_MAPPING
+TTS_LANGUAGES = ("en", "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh", "hi", "ar")
+
+# Sentence boundaries used to split long lines into separate TTS requests
+SENTENCE_BREAK = re.compile(r"(?<=[.!?。！？])\s+")
+
+# Languages voiced with eleven_monolingual_v1 on the untimed path
+MONOLINGUAL_MODEL_LANGUAGES = frozenset({"hi", "ar", "zh", "ja", "ko"})
+
+# Flattened (language, gender) -> voice ID view of VOICE_MAPPING for single-lookup voice selection
+VOICE_LOOKUP = {
+    (language, gender): voice_id
+    for language, voices in VOICE_MAPPING.items()
+    for gender, voice_id in voices.items()
+}
+
+ELEVENLABS_MAX_RETRIES = 3
+# _call_elevenlabs owns retries for synthesis, so the SDK must not retry underneath it as well
+SDK_REQUEST_OPTIONS = {"max_retries": 0}
+
+# New TTS cache files written between directory scans for pruning
+TTS_CACHE_PRUNE_INTERVAL = 100
+
+@functools.lru_cache(maxsize=128)
+def _resolve_voice(language: str, gender: str, default_voice_id: str) -> str:
+    """Memoized voice lookup so per-segment calls skip re-normalizing the language code"""
+    # Get the base language code (e.g., 'en' from 'en-US')
+    base_language = language.partition('-')[0].lower()
+    return VOICE_LOOKUP.get((base_language, gender)) or VOICE_LOOKUP.get((base_language, "unknown"), default_voice_id)
+
+# One ElevenLabs client per process so concurrent jobs share a connection pool and TLS sessions
+_CLIENT_LOCK = threading.Lock()
+_CLIENT = None
+# Process-wide cap on in-flight ElevenLabs requests across all jobs; match it to the plan's concurrency limit
+_ELEVENLABS_SLOTS = None
+
+def _get_client(api_key: str) -> ElevenLabs:
+    """Return the process-wide ElevenLabs client, creating it on first use"""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            max_connections = int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "64"))
+            http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2),
+                timeout=60,
+                # Retries failed connects; HTTP-level 429/5xx retries are handled by _call_elevenlabs
+                transport=httpx.HTTPTransport(retries=3)
+            )
+            _CLIENT = ElevenLabs(api_key=api_key, httpx_client=http_client)
+        return _CLIENT
+
+def _get_elevenlabs_slots() -> threading.BoundedSemaphore:
+    """Return the process-wide ElevenLabs request semaphore, sized from the environment on first use (after .env is loaded)"""
+    global _ELEVENLABS_SLOTS
+    with _CLIENT_LOCK:
+        if _ELEVENLABS_SLOTS is None:
+            _ELEVENLABS_SLOTS = threading.BoundedSemaphore(int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "5")))
+        return _ELEVENLABS_SLOTS
 
 class TTSService:
     def __init__(self):
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
         self.service = os.getenv("TTS_SERVICE", "elevenlabs")
         self.default_voice_id = os.getenv("TTS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
+        self.output_root = os.getenv("OUTPUT_DIR", "./outputs")
+        self.concurrency = int(os.getenv("TTS_CONCURRENCY", "6"))
+        
+        self.client = _get_client(self.api_key) if self.api_key else None
+        # Native async client for plain API calls that need no thread-side audio work
+        self.async_client = AsyncElevenLabs(api_key=self.api_key) if self.api_key else None
+        
+        # Synthesized PCM shared across jobs, keyed by (text, voice, model, format)
+        self.cache_dir = os.path.join(os.getenv("TEMP_DIR", "./temp"), "tts_cache")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache_max_files = int(os.getenv("TTS_CACHE_MAX_FILES", "5000"))
+        self._cache_writes = 0
+        self._cache_writes_lock = threading.Lock()
+        
+        # Consecutive same-voice lines separated by at most this many seconds are voiced in one request
+        self.merge_gap = float(os.getenv("TTS_MERGE_GAP", "0"))
+        # Lines longer than this many characters are synthesized as parallel sentence groups
+        self.split_chars = int(os.getenv("TTS_SPLIT_CHARS", "0"))
+        
+        # Dedicated pool so blocking ElevenLabs calls and audio work never starve the default executor
+        self._pool = ThreadPoolExecutor(max_workers=int(os.getenv("TTS_WORKERS", "8")), thread_name_prefix="tts")
         
-        if self.api_key:
-            self.client = ElevenLabs(api_key=self.api_key)
-        else:
-            self.client = None
+        # The voice catalog rarely changes, so keep it for a while instead of fetching it per job
+        self._voices_cache = None
+        self._voices_expiry = 0.0
+        self._voices_ttl = float(os.getenv("VOICES_CACHE_TTL", "600"))
+        self._voices_lock = asyncio.Lock()
+        # Last fetched catalog on disk, so restarts and other workers skip the download
+        self._voices_file = os.path.join(os.getenv("TEMP_DIR", "./temp"), "elevenlabs_voices.json")
+        self._voices_disk_ttl = float(os.getenv("VOICES_DISK_CACHE_TTL", "86400"))
+    
+    def close(self):
+        """Release the TTS thread pool"""
+        self._pool.shutdown(wait=False)
     
     async def generate_speech(self, text: str, target_language: str, job_id: str, gender: str = "unknown", voice_id: str = None) -> str:
         """Generate speech from text using ElevenLabs TTS with gender-based voice selection"""
@@ -26,15 +196,15 @@ class TTSService:
                 raise Exception("ElevenLabs API key not configured")
             
             # Create output directory
-            output_dir = os.path.join(os.getenv("OUTPUT_DIR", "./outputs"), job_id)
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = os.path.join(self.output_root, job_id)
+            ensure_dir(output_dir)
             
             # Run TTS generation in executor with timeout
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             try:
                 audio_path = await asyncio.wait_for(
                     loop.run_in_executor(
-                        None, self._generate_speech_sync, text, target_language, output_dir, gender, voice_id
+                        self._pool, self._generate_speech_sync, text, target_language, output_dir, gender, voice_id
                     ),
                     timeout=60.0  # 60 second timeout
                 )
@@ -51,122 +221,80 @@ class TTSService:
             # Use provided voice_id or select appropriate voice based on language and gender
             if not voice_id:
                 voice_id = self._get_voice_for_language_and_gender(target_language, gender)
-            print(f"DEBUG: Using voice_id: {voice_id} for language: {target_language}, gender: {gender}")
+            logger.debug("Using voice_id: %s for language: %s, gender: %s", voice_id, target_language, gender)
             
             # Choose appropriate model based on language
             # Use eleven_multilingual_v2 for most languages, but fallback to eleven_monolingual_v1 for problematic ones
-            if target_language in ["hi", "ar", "zh", "ja", "ko"]:
+            if target_language in MONOLINGUAL_MODEL_LANGUAGES:
                 model_id = "eleven_monolingual_v1"  # More reliable for non-Latin scripts
             else:
                 model_id = "eleven_multilingual_v2"  # Better for Latin script languages
             
-            print(f"DEBUG: Using model: {model_id} for language: {target_language}")
+            logger.debug("Using model: %s for language: %s", model_id, target_language)
             
             # Clean the text to remove any problematic characters
             cleaned_text = text.strip()
             if not cleaned_text:
                 raise Exception("Empty text after cleaning")
             
-            # Generate audio using the API
-            audio = self.client.text_to_speech.convert(
-                text=cleaned_text,
-                voice_id=voice_id,
-                model_id=model_id
-            )
-            
-            # Save audio file
+            # Reuse an identical earlier synthesis if we have one
             output_path = os.path.join(output_dir, "dubbed_audio.mp3")
-            with open(output_path, "wb") as f:
-                # Handle both bytes and generator responses
-                if hasattr(audio, '__iter__') and not isinstance(audio, bytes):
-                    # If it's a generator, read all chunks
-                    audio_data = b''.join(audio)
-                    f.write(audio_data)
-                else:
-                    # If it's already bytes
-                    f.write(audio)
+            cache_file = self._cache_path(cleaned_text, voice_id, model_id, "mp3")
+            if os.path.exists(cache_file):
+                logger.debug("Using cached TTS audio: %s", cache_file)
+                self._touch_cache_file(cache_file)
+                self._copy_into_place(cache_file, output_path)
+                return output_path
+            
+            # Use the streaming endpoint so bytes are written to disk while the rest is still being synthesized
+            # (the SDK names it "stream" from v2, "convert_as_stream" before that)
+            stream_speech = getattr(self.client.text_to_speech, "stream", None) or self.client.text_to_speech.convert_as_stream
+            
+            temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            
+            def stream_to_file():
+                audio = stream_speech(
+                    text=cleaned_text,
+                    voice_id=voice_id,
+                    model_id=model_id,
+                    request_options=SDK_REQUEST_OPTIONS
+                )
+                
+                # Save audio into the cache; write then rename so readers never see a partial file
+                with open(temp_file, "wb", buffering=1 << 20) as f:
+                    # Handle both bytes and generator responses
+                    if isinstance(audio, (bytes, bytearray)):
+                        f.write(audio)
+                    else:
+                        # If it's a generator, write chunks as they arrive instead of buffering the whole MP3
+                        for chunk in audio:
+                            f.write(chunk)
             
-            print(f"DEBUG: Audio generated successfully: {output_path}")
+            try:
+                self._call_elevenlabs(stream_to_file)
+                os.replace(temp_file, cache_file)
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            self._copy_into_place(cache_file, output_path)
+            self._cache_written()
+            
+            logger.debug("Audio generated successfully: %s", output_path)
             return output_path
             
         except Exception as e:
-            print(f"DEBUG: TTS generation error: {str(e)}")
+            logger.warning("TTS generation error: %s", e)
             raise Exception(f"ElevenLabs TTS error: {str(e)}")
     
+    def _copy_into_place(self, source: str, destination: str):
+        """Copy a cache file to its own inode and rename it into place, so later writes to the output can't touch the cache"""
+        temp_file = f"{destination}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source, temp_file)
+        os.replace(temp_file, destination)
+    
     def _get_voice_for_language_and_gender(self, language: str, gender: str = "unknown") -> str:
         """Get appropriate voice ID for the target language and gender"""
-        # Language and gender to voice mapping for ElevenLabs
-        voice_mapping = {
-            "en": {
-                "male": "ErXwobaYiN019PkySvjV",    # Antoni - English (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - English (Female)
-                "unknown": "21m00Tcm4TlvDq8ikWAM"  # Default English voice
-            },
-            "es": {
-                "male": "ErXwobaYiN019PkySvjV",    # Antoni - Spanish (Male)
-                "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - Spanish (Female)
-                "unknown": "ErXwobaYiN019PkySvjV"  # Default Spanish voice
-            },
-            "fr": {
-                "male": "yoZ06aMxZJJ28mfd3POQ",    # Josh - French (Male)
-                "female": "AZnzlk1XvdvUeBnXmlld",  # Domi - French (Female)
-                "unknown": "yoZ06aMxZJJ28mfd3POQ"  # Default French voice
-            },
-            "de": {
-                "male": "AZnzlk1XvdvUeBnXmlld",    # Domi - German (Male)
-                "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - German (Female)
-                "unknown": "AZnzlk1XvdvUeBnXmlld"  # Default German voice
-            },
-            "it": {
-                "male": "ErXwobaYiN019PkySvjV",    # Antoni - Italian (Male)
-                "female": "EXAVITQu4vr4xnSDxMaL",  # Bella - Italian (Female)
-                "unknown": "EXAVITQu4vr4xnSDxMaL"  # Default Italian voice
-            },
-            "pt": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Portuguese (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Portuguese (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Portuguese voice
-            },
-            "ru": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Russian (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Russian (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Russian voice
-            },
-            "ja": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Japanese (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Japanese (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Japanese voice
-            },
-            "ko": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Korean (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Korean (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Korean voice
-            },
-            "zh": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Chinese (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Chinese (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Chinese voice
-            },
-            "hi": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Hindi (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Hindi (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Hindi voice
-            },
-            "ar": {
-                "male": "VR6AewLTigWG4xSOukaG",    # Arnold - Arabic (Male)
-                "female": "21m00Tcm4TlvDq8ikWAM",  # Rachel - Arabic (Female)
-                "unknown": "VR6AewLTigWG4xSOukaG"  # Default Arabic voice
-            }
-        }
-        
-        # Get the base language code (e.g., 'en' from 'en-US')
-        base_language = language.split('-')[0].lower()
-        
-        # Get gender-specific voice mapping
-        language_voices = voice_mapping.get(base_language, {})
-        voice_id = language_voices.get(gender, language_voices.get("unknown", self.default_voice_id))
-        
-        return voice_id
+        return _resolve_voice(language, gender, self.default_voice_id)
     
     def _get_voice_for_language(self, language: str) -> str:
         """Get appropriate voice ID for the target language (backward compatibility)"""
@@ -176,52 +304,93 @@ class TTSService:
         """Get list of available voices from ElevenLabs with timeout"""
         try:
             if not self.api_key:
-                print("DEBUG: No API key available, skipping voice download")
+                logger.debug("No API key available, skipping voice download")
                 return []
             
-            print("DEBUG: Starting to download available voices from ElevenLabs...")
+            logger.debug("Starting to download available voices from ElevenLabs...")
             
-            # Run API call in executor with timeout
-            loop = asyncio.get_event_loop()
+            # Await the API call directly instead of occupying a TTS worker thread
             try:
                 voices = await asyncio.wait_for(
-                    loop.run_in_executor(None, self._get_voices_sync),
+                    self._fetch_voices(),
                     timeout=30.0  # 30 second timeout
                 )
-                print(f"DEBUG: Successfully downloaded {len(voices)} voices from ElevenLabs")
+                logger.debug("Successfully downloaded %s voices from ElevenLabs", len(voices))
                 return voices
             except asyncio.TimeoutError:
-                print("DEBUG: Timeout while downloading voices from ElevenLabs (30s)")
+                logger.warning("Timeout while downloading voices from ElevenLabs (30s)")
                 return []
             
         except Exception as e:
-            print(f"DEBUG: Failed to get voices: {e}")
+            logger.warning("Failed to get voices: %s", e)
             return []
     
-    def _get_voices_sync(self) -> list:
-        """Synchronous API call to get available voices"""
+    async def _fetch_voices(self) -> list:
+        """Async API call to get available voices"""
         try:
-            if not self.client:
-                print("DEBUG: No ElevenLabs client available")
+            if not self.async_client:
+                logger.debug("No ElevenLabs client available")
                 return []
             
-            print("DEBUG: Making API call to ElevenLabs voices endpoint...")
-            voices_response = self.client.voices.get_all()
-            
-            # Handle the GetVoicesResponse object properly
-            if hasattr(voices_response, 'voices'):
-                voices = voices_response.voices
-            else:
-                # If it's already a list
-                voices = voices_response
+            # Concurrent jobs wait for a single in-flight fetch instead of each downloading the catalog
+            async with self._voices_lock:
+                if self._voices_cache is not None and time.monotonic() < self._voices_expiry:
+                    return self._voices_cache
+                
+                voices = self._load_voices_file()
+                if not voices:
+                    logger.debug("Making API call to ElevenLabs voices endpoint...")
+                    voices_response = await self.async_client.voices.get_all()
+                    
+                    # Handle the GetVoicesResponse object properly
+                    if hasattr(voices_response, 'voices'):
+                        voices = voices_response.voices
+                    else:
+                        # If it's already a list
+                        voices = voices_response
+                    
+                    logger.debug("API call successful, received %s voices", len(voices))
+                    if voices:
+                        self._save_voices_file(voices)
+                
+                if voices:
+                    self._voices_cache = voices
+                    self._voices_expiry = time.monotonic() + self._voices_ttl
+                return voices
             
-            print(f"DEBUG: API call successful, received {len(voices)} voices")
+        except Exception as e:
+            logger.warning("Error fetching voices from ElevenLabs API: %s", e)
+            return []
+    
+    def _load_voices_file(self) -> list:
+        """Read the voice catalog saved by an earlier fetch, if it is recent enough"""
+        try:
+            if not os.path.exists(self._voices_file) or time.time() - os.path.getmtime(self._voices_file) > self._voices_disk_ttl:
+                return []
+            with open(self._voices_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            validate = getattr(Voice, "model_validate", None) or Voice.parse_obj
+            voices = [validate(item) for item in data]
+            logger.debug("Loaded %s voices from %s", len(voices), self._voices_file)
             return voices
-            
         except Exception as e:
-            print(f"DEBUG: Error fetching voices from ElevenLabs API: {e}")
+            logger.warning("Error loading cached voice catalog: %s", e)
             return []
     
+    def _save_voices_file(self, voices: list):
+        """Persist the voice catalog for other processes and restarts"""
+        try:
+            data = [
+                voice.model_dump(mode="json") if hasattr(voice, "model_dump") else json.loads(voice.json())
+                for voice in voices
+            ]
+            temp_file = f"{self._voices_file}.{os.getpid()}.tmp"
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self._voices_file)
+        except Exception as e:
+            logger.warning("Error saving voice catalog: %s", e)
+    
     async def generate_speech_with_timing(self, segments: list, target_language: str, job_id: str, adjust_speed: bool = False) -> str:
         """Generate speech for segments with timing information and optional speed adjustment"""
         try:
@@ -229,16 +398,75 @@ class TTSService:
                 raise Exception("No segments provided for speech generation")
             
             # Create output directory
-            output_dir = os.path.join(os.getenv("OUTPUT_DIR", "./outputs"), job_id)
-            os.makedirs(output_dir, exist_ok=True)
+            output_dir = os.path.join(self.output_root, job_id)
+            ensure_dir(output_dir)
             
-            # Run TTS generation in executor with timeout
-            loop = asyncio.get_event_loop()
+            # Resolve text and voice per segment, bucketing identical lines so each is synthesized once
+            timed_segments = []
+            for i, segment in enumerate(segments):
+                text = segment.get("translated_text", "").strip()
+                if not text:
+                    continue
+                
+                # Use the matched voice ID from intelligent voice matching, or fallback to generic selection
+                voice_id = segment.get("matched_voice_id")
+                if not voice_id:
+                    voice_id = self._get_voice_for_language(target_language)
+                    logger.debug("No matched voice ID for segment %d, using fallback voice: %s", i, voice_id)
+                else:
+                    logger.debug("Using matched voice ID for segment %d: %s", i, voice_id)
+                
+                # Workers only need the timing, so pass plain floats instead of the whole segment dict
+                start = segment.get("start", 0)
+                end = segment.get("end", 0)
+                timed_segments.append(((text, voice_id), (start, end, segment.get("original_duration", end - start))))
+            
+            if self.merge_gap > 0:
+                timed_segments = self._merge_close_segments(timed_segments)
+            
+            unique_requests = list(dict.fromkeys(key for key, _ in timed_segments))
+            logger.debug("%s segments need %s unique TTS requests", len(timed_segments), len(unique_requests))
+            
+            # Synthesize concurrently; the semaphore keeps us within ElevenLabs rate limits
+            loop = asyncio.get_running_loop()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            
+            async def synthesize_piece(text: str, voice_id: str) -> bytes:
+                async with semaphore:
+                    return await loop.run_in_executor(self._pool, self._synthesize_pcm_sync, text, voice_id)
+            
+            async def synthesize(text: str, voice_id: str) -> bytes:
+                # Long lines are voiced as parallel sentence groups and joined back into one clip
+                pieces = self._split_text(text)
+                if len(pieces) == 1:
+                    return await synthesize_piece(text, voice_id)
+                return b"".join(await asyncio.gather(*[synthesize_piece(piece, voice_id) for piece in pieces]))
+            
+            # Each request's audio is processed as soon as it arrives, overlapping decode and
+            # time-stretching with the requests still in flight
+            pending_pcm = {key: asyncio.ensure_future(synthesize(*key)) for key in unique_requests}
+            
+            async def build(key: tuple, span: tuple) -> dict:
+                pcm = await pending_pcm[key]
+                # Speed adjustment depends on each occurrence's own duration, so it runs per segment
+                return await loop.run_in_executor(
+                    self._pool, self._build_timed_segment_sync, pcm, span, adjust_speed
+                )
+            
+            async def generate() -> str:
+                try:
+                    audio_segments = await asyncio.gather(*[build(key, span) for key, span in timed_segments])
+                finally:
+                    for future in pending_pcm.values():
+                        future.cancel()
+                return await loop.run_in_executor(
+                    self._pool, self._export_timed_audio_sync, list(audio_segments), output_dir
+                )
+            
+            # Run TTS generation with timeout
             try:
                 audio_path = await asyncio.wait_for(
-                    loop.run_in_executor(
-                        None, self._generate_speech_with_timing_sync, segments, target_language, output_dir, adjust_speed
-                    ),
+                    generate(),
                     timeout=120.0  # 120 second timeout for timing-aware generation
                 )
                 return audio_path
@@ -248,225 +476,301 @@ class TTSService:
         except Exception as e:
             raise Exception(f"Speech generation with timing failed: {str(e)}")
     
-    def _generate_speech_with_timing_sync(self, segments: list, target_language: str, output_dir: str, adjust_speed: bool = False) -> str:
-        """Synchronous speech generation for segments with timing and speed adjustment"""
-        try:
-            from pydub import AudioSegment
-            import tempfile
-            import hashlib
-            import os
-            
-            # Create cache directory
-            cache_dir = os.path.join(output_dir, "tts_cache")
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            # Generate audio for each segment
-            audio_segments = []
-            
-            for i, segment in enumerate(segments):
-                text = segment.get("translated_text", "")
-                original_duration = segment.get("original_duration", 0)
-                
-                if not text.strip():
-                    continue
-                
-                # Use the matched voice ID from intelligent voice matching, or fallback to generic selection
-                voice_id = segment.get("matched_voice_id")
-                if not voice_id:
-                    voice_id = self._get_voice_for_language(target_language)
-                    print(f"DEBUG: No matched voice ID for segment {i}, using fallback voice: {voice_id}")
-                else:
-                    print(f"DEBUG: Using matched voice ID for segment {i}: {voice_id}")
-                
-                # Create cache key based on text and voice
-                cache_key = hashlib.md5(f"{text}_{voice_id}".encode()).hexdigest()
-                cache_file = os.path.join(cache_dir, f"{cache_key}.mp3")
-                
-                # Check if cached audio exists
-                if os.path.exists(cache_file):
-                    print(f"DEBUG: Using cached TTS audio for segment {i}")
-                    segment_audio = AudioSegment.from_mp3(cache_file)
-                else:
-                    print(f"DEBUG: Generating new TTS audio for segment {i}")
-                    # Generate audio for this segment
-                    audio = self.client.text_to_speech.convert(
-                        text=text,
-                        voice_id=voice_id,
-                        model_id="eleven_multilingual_v2"
+    def _merge_close_segments(self, timed_segments: list) -> list:
+        """Join runs of same-voice segments with short pauses between them into single TTS requests"""
+        merged = []
+        for (text, voice_id), (start, end, duration) in timed_segments:
+            if merged:
+                (previous_text, previous_voice), (previous_start, previous_end, _) = merged[-1]
+                gap = start - previous_end
+                if voice_id == previous_voice and 0 <= gap <= self.merge_gap:
+                    merged[-1] = (
+                        (f"{previous_text} {text}", voice_id),
+                        (previous_start, end, end - previous_start)
                     )
+                    continue
+            merged.append(((text, voice_id), (start, end, duration)))
+        
+        if len(merged) < len(timed_segments):
+            logger.debug("Merged %s segments into %s TTS requests", len(timed_segments), len(merged))
+        return merged
+    
+    async def prefetch_speech(self, text: str, voice_id: Optional[str], target_language: str):
+        """Synthesize one line into the TTS cache ahead of generate_speech_with_timing"""
+        text = text.strip()
+        # With TTS_MERGE_GAP the timed pass voices merged lines, so a per-line prefetch would be billed twice
+        if not text or self.merge_gap > 0:
+            return
+        # Resolve the voice exactly as generate_speech_with_timing does so the cache key matches
+        voice_id = voice_id or self._get_voice_for_language(target_language)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._pool, self._synthesize_pcm_sync, piece, voice_id)
+            for piece in self._split_text(text)
+        ])
+    
+    def _split_text(self, text: str) -> list:
+        """Split text longer than TTS_SPLIT_CHARS into sentence groups that each fit the limit"""
+        if self.split_chars <= 0 or len(text) <= self.split_chars:
+            return [text]
+        
+        pieces = []
+        current = ""
+        for sentence in SENTENCE_BREAK.split(text):
+            if current and len(current) + 1 + len(sentence) > self.split_chars:
+                pieces.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _synthesize_pcm_sync(self, text: str, voice_id: str) -> bytes:
+        """Synchronous speech generation returning raw PCM, served from the TTS cache when possible"""
+        try:
+            model_id = "eleven_multilingual_v2"
+            output_format = f"pcm_{PCM_SAMPLE_RATE}"
+            
+            # Create cache key based on everything that affects the synthesized audio
+            cache_file = self._cache_path(text, voice_id, model_id, output_format)
+            
+            # Check if cached audio exists
+            if os.path.exists(cache_file):
+                logger.debug("Using cached TTS audio for: %.50s", text)
+                self._touch_cache_file(cache_file)
+                with open(cache_file, "rb") as f:
+                    return f.read()
+            
+            logger.debug("Generating new TTS audio for: %.50s", text)
+            # Generate raw PCM so no MP3 decode is needed
+            def convert() -> bytes:
+                audio = self.client.text_to_speech.convert(
+                    text=text,
+                    voice_id=voice_id,
+                    model_id=model_id,
+                    output_format=output_format,
+                    request_options=SDK_REQUEST_OPTIONS
+                )
                 
-                                    # Save to temporary file
-                    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as temp_file:
-                        # Handle both bytes and generator responses
-                        if hasattr(audio, '__iter__') and not isinstance(audio, bytes):
-                            # If it's a generator, read all chunks
-                            audio_data = b''.join(audio)
-                            temp_file.write(audio_data)
-                        else:
-                            # If it's already bytes
-                            temp_file.write(audio)
-                        temp_file.flush()
-                        
-                        # Load audio and save to cache
-                        segment_audio = AudioSegment.from_mp3(temp_file.name)
-                        
-                        # Save to cache for future use
-                        segment_audio.export(cache_file, format="mp3")
-                        print(f"DEBUG: Saved TTS audio to cache: {cache_file}")
-                        
-                        # Clean up temporary file
-                        os.unlink(temp_file.name)
-                
-                # Now adjust speed if needed (this doesn't affect the cached version)
-                if adjust_speed and original_duration > 0:
-                    print(f"DEBUG: Adjusting audio speed for segment:")
-                    print(f"  Original duration: {original_duration:.1f}s")
-                    print(f"  Generated duration: {len(segment_audio)/1000:.1f}s")
-                    
-                    segment_audio = self._adjust_audio_speed(segment_audio, original_duration)
-                    print(f"  Adjusted duration: {len(segment_audio)/1000:.1f}s")
-                
-                audio_segments.append({
-                    "audio": segment_audio,
-                    "start": segment.get("start", 0),
-                    "end": segment.get("end", 0)
-                })
+                # Handle both bytes and generator responses
+                if hasattr(audio, '__iter__') and not isinstance(audio, bytes):
+                    return b''.join(audio)
+                return audio
             
-            # Combine audio segments with proper timing
-            combined_audio = self._combine_audio_segments(audio_segments)
+            audio_data = self._call_elevenlabs(convert)
             
-            # Save combined audio
-            output_path = os.path.join(output_dir, "dubbed_audio.mp3")
-            combined_audio.export(output_path, format="mp3")
+            # Save the raw PCM to cache for future use; write then rename so readers never see a partial file
+            temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, "wb") as f:
+                f.write(audio_data)
+            os.replace(temp_file, cache_file)
+            logger.debug("Saved TTS audio to cache: %s", cache_file)
+            self._cache_written()
             
-            return output_path
+            return audio_data
             
         except Exception as e:
             raise Exception(f"Speech generation with timing error: {str(e)}")
     
-    def _adjust_audio_speed(self, audio: AudioSegment, target_duration: float) -> AudioSegment:
-        """Adjust audio speed to match target duration"""
+    def _call_elevenlabs(self, request):
+        """Run an ElevenLabs request within the plan's concurrency limit, retrying transient failures"""
+        for attempt in range(ELEVENLABS_MAX_RETRIES + 1):
+            try:
+                # Held until the response has been fully read, since streamed audio keeps the request open
+                with _get_elevenlabs_slots():
+                    return request()
+            except Exception as e:
+                status_code = getattr(e, "status_code", None)
+                transient = status_code in (429, 500, 502, 503, 504) or isinstance(e, httpx.TransportError)
+                if not transient or attempt == ELEVENLABS_MAX_RETRIES:
+                    raise
+                if "too_many_concurrent_requests" in str(getattr(e, "body", "")):
+                    # Another process holds the plan's slots; a slot frees up within a request's time
+                    delay = random.uniform(0.1, 0.5)
+                else:
+                    # system_busy, 5xx or a dropped connection: back off with jitter (~1s, 2s, 4s)
+                    delay = (2 ** attempt) + random.random()
+                logger.warning("ElevenLabs request failed (%s), retrying in %.1fs", status_code or type(e).__name__, delay)
+                time.sleep(delay)
+    
+    def _cache_path(self, text: str, voice_id: str, model_id: str, output_format: str) -> str:
+        """Content-addressed cache file for everything that affects the synthesized audio"""
+        cache_key = hashlib.blake2b(f"{text}|{voice_id}|{model_id}|{output_format}".encode(), digest_size=16).hexdigest()
+        extension = "mp3" if output_format.startswith("mp3") else "pcm"
+        return os.path.join(self.cache_dir, f"{cache_key}.{extension}")
+    
+    def _touch_cache_file(self, cache_file: str):
+        """Mark a cache file as recently used (mtime, since atime isn't updated on relatime/noatime mounts)"""
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+    
+    def _cache_written(self):
+        """Count a new cache file and prune every TTS_CACHE_PRUNE_INTERVAL writes rather than after each one"""
+        with self._cache_writes_lock:
+            self._cache_writes += 1
+            due = self._cache_writes % TTS_CACHE_PRUNE_INTERVAL == 0
+        if due:
+            self._prune_cache()
+    
+    def _prune_cache(self):
+        """Drop the least recently used cache files once the cache grows past TTS_CACHE_MAX_FILES"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.is_file() and not entry.name.endswith(".tmp")]
+            excess = len(entries) - self.cache_max_files
+            if excess <= 0:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        except Exception as e:
+            logger.warning("TTS cache pruning failed: %s", e)
+    
+    def _build_timed_segment_sync(self, audio_data: bytes, span: tuple, adjust_speed: bool = False) -> dict:
+        """Turn synthesized PCM for one (start, end, original_duration) span into samples fitted to its duration"""
+        start, end, original_duration = span
+        
+        # 16-bit little-endian mono PCM
+        samples = np.frombuffer(audio_data, dtype=np.int16)
+        
+        # Now adjust speed if needed (this doesn't affect the cached version)
+        if adjust_speed and original_duration > 0:
+            logger.debug("Adjusting audio speed for segment: original %.1fs, generated %.1fs",
+                         original_duration, len(samples) / PCM_SAMPLE_RATE)
+            
+            samples = self._adjust_audio_speed(samples, PCM_SAMPLE_RATE, original_duration)
+            logger.debug("Adjusted duration: %.1fs", len(samples) / PCM_SAMPLE_RATE)
+        
+        return {
+            "samples": samples,
+            "start": start,
+            "end": end
+        }
+    
+    def _export_timed_audio_sync(self, audio_segments: list, output_dir: str) -> str:
+        """Stream the timed segments straight into an ffmpeg MP3 encoder and export the dubbed track"""
+        output_path = os.path.join(output_dir, "dubbed_audio.mp3")
+        
+        # Feed PCM chunks to ffmpeg as they are laid out instead of building the full track in memory
+        process = subprocess.Popen(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "s16le", "-ar", str(PCM_SAMPLE_RATE), "-ac", "1", "-i", "-",
+                "-codec:a", "libmp3lame", output_path
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
         try:
-            current_duration = len(audio) / 1000.0  # Convert to seconds
+            wrote_audio = False
+            for chunk in self._iter_timed_chunks(audio_segments):
+                process.stdin.write(chunk.tobytes())
+                wrote_audio = True
+            
+            if not wrote_audio:
+                # 1 second of silence if there was nothing to say
+                process.stdin.write(np.zeros(PCM_SAMPLE_RATE, dtype=np.int16).tobytes())
+        finally:
+            process.stdin.close()
+            process.wait()
+        
+        if process.returncode != 0:
+            raise Exception(f"ffmpeg MP3 encoding failed with exit code {process.returncode}")
+        
+        return output_path
+    
+    def _adjust_audio_speed(self, samples: np.ndarray, sample_rate: int, target_duration: float) -> np.ndarray:
+        """Adjust the speed of int16 samples to match target duration"""
+        try:
+            current_duration = len(samples) / sample_rate
             
             if current_duration <= 0 or target_duration <= 0:
-                return audio
+                return samples
             
             # Calculate speed ratio
             # If current_duration < target_duration, we need to slow down (speed_ratio < 1)
             # If current_duration > target_duration, we need to speed up (speed_ratio > 1)
             speed_ratio = current_duration / target_duration
             
-            print(f"DEBUG: Speed adjustment calculation:")
-            print(f"  Current duration: {current_duration:.1f}s")
-            print(f"  Target duration: {target_duration:.1f}s")
-            print(f"  Speed ratio: {speed_ratio:.3f}")
+            logger.debug("Speed adjustment: current %.1fs, target %.1fs, ratio %.3f",
+                         current_duration, target_duration, speed_ratio)
             
             # Limit speed adjustment to prevent unnatural speech (max ±30%)
             max_speed_adjustment = 0.30
             if speed_ratio > (1 + max_speed_adjustment):
                 speed_ratio = 1 + max_speed_adjustment
-                print(f"  Limited speed ratio to: {speed_ratio:.3f} (max speed up)")
+                logger.debug("Limited speed ratio to %.3f (max speed up)", speed_ratio)
             elif speed_ratio < (1 - max_speed_adjustment):
                 speed_ratio = 1 - max_speed_adjustment
-                print(f"  Limited speed ratio to: {speed_ratio:.3f} (max slow down)")
+                logger.debug("Limited speed ratio to %.3f (max slow down)", speed_ratio)
             
             # Apply speed adjustment - ONLY for speeding up (ratio > 1)
             if speed_ratio > 1.0:
-                print(f"  Applying speed adjustment (speed up) with ratio: {speed_ratio:.3f}")
+                logger.debug("Speeding up by %.3f: %.1fs -> %.1fs",
+                             speed_ratio, current_duration, current_duration / speed_ratio)
                 
-                # Only handle speed up (pydub works for this)
-                print(f"  Input duration: {len(audio)/1000:.1f}s")
-                print(f"  Target duration: {len(audio)/1000/speed_ratio:.1f}s")
+                # Pitch-preserving phase-vocoder stretch on the raw samples
+                stretched = librosa.effects.time_stretch(samples.astype(np.float32) / 32768.0, rate=speed_ratio)
+                adjusted_samples = (np.clip(stretched, -1.0, 1.0) * 32767).astype(np.int16)
+                logger.debug("Output duration: %.1fs", len(adjusted_samples) / sample_rate)
                 
-                adjusted_audio = audio.speedup(playback_speed=speed_ratio)
-                print(f"  Output duration: {len(adjusted_audio)/1000:.1f}s")
-                
-                return adjusted_audio
+                return adjusted_samples
             elif speed_ratio < 1.0:
-                print(f"  TTS audio is shorter than original - skipping speed adjustment")
-                print(f"  Input duration: {len(audio)/1000:.1f}s")
-                print(f"  Target duration: {target_duration:.1f}s")
-                print(f"  Using original TTS duration (OpenAI should handle timing)")
-                return audio
+                # TTS audio is shorter than original - OpenAI should handle timing
+                logger.debug("TTS audio shorter than original (%.1fs < %.1fs) - skipping speed adjustment",
+                             current_duration, target_duration)
+                return samples
             else:
-                print(f"  No speed adjustment needed")
+                logger.debug("No speed adjustment needed")
             
-            return audio
+            return samples
             
         except Exception as e:
-            print(f"Audio speed adjustment failed: {str(e)}")
-            return audio
+            logger.warning("Audio speed adjustment failed: %s", e)
+            return samples
             
     
-    def _combine_audio_segments(self, audio_segments: list) -> AudioSegment:
-        """Combine audio segments maintaining original timing by adding gaps when TTS is shorter"""
-        try:
-            if not audio_segments:
-                # Return a short silent audio if no segments
-                return AudioSegment.silent(duration=1000)  # 1 second of silence
-            
-            # Sort segments by start time to ensure proper order
-            sorted_segments = sorted(audio_segments, key=lambda x: x.get("start", 0))
-            
-            # Use sequential combination with timing preservation
-            combined_audio = AudioSegment.empty()
-            current_position = 0
-            
-            for i, segment in enumerate(sorted_segments):
-                if "audio" in segment:
-                    audio = segment["audio"]
-                    original_start = segment.get("start", 0)
-                    original_end = segment.get("end", 0)
-                    original_duration = original_end - original_start
-                    tts_duration = len(audio) / 1000.0  # Convert to seconds
-                    
-                    print(f"DEBUG: Processing segment {i}:")
-                    print(f"  Original timing: {original_start:.1f}s - {original_end:.1f}s (duration: {original_duration:.1f}s)")
-                    print(f"  TTS duration: {tts_duration:.1f}s")
-                    print(f"  Current position: {current_position:.1f}s")
-                    
-                    # Calculate how much gap we need to add to maintain original timing
-                    if i == 0:
-                        # First segment: add gap from start if needed
-                        if original_start > 0:
-                            gap_duration = original_start * 1000  # Convert to milliseconds
-                            gap = AudioSegment.silent(duration=gap_duration)
-                            combined_audio = combined_audio + gap
-                            current_position = original_start
-                            print(f"  Added initial gap: {original_start:.1f}s")
-                    else:
-                        # Subsequent segments: ensure they start at original timing
-                        expected_start = original_start
-                        if current_position < expected_start:
-                            # Add gap to reach original start time
-                            gap_duration = (expected_start - current_position) * 1000  # Convert to milliseconds
-                            gap = AudioSegment.silent(duration=gap_duration)
-                            combined_audio = combined_audio + gap
-                            current_position = expected_start
-                            print(f"  Added gap to maintain timing: {(expected_start - current_position + gap_duration/1000):.1f}s")
-                        elif current_position > expected_start:
-                            # TTS is longer than expected, just continue
-                            print(f"  TTS longer than expected, continuing at current position")
-                    
-                    # Add the audio segment
-                    combined_audio = combined_audio + audio
-                    current_position += tts_duration
-                    
-                    print(f"  Final position: {current_position:.1f}s")
-                    print(f"  ---")
-            
-            return combined_audio
-            
-        except Exception as e:
-            print(f"Audio combination failed: {str(e)}")
-            # Return a fallback silent audio
-            return AudioSegment.silent(duration=1000)
-    
-
+    def _iter_timed_chunks(self, audio_segments: list):
+        """Yield int16 PCM chunks (clips and silence gaps) laid out to maintain original timing"""
+        # Sort segments by start time to ensure proper order
+        sorted_segments = sorted(audio_segments, key=lambda x: x.get("start", 0))
+        
+        # Segments never overlap in this layout, so gaps and clips can be emitted in order
+        frame_rate = PCM_SAMPLE_RATE
+        current_sample = 0
+        
+        for i, segment in enumerate(sorted_segments):
+            if "samples" in segment:
+                samples = segment["samples"]
+                original_start = segment.get("start", 0)
+                original_end = segment.get("end", 0)
+                original_duration = original_end - original_start
+                tts_duration = len(samples) / frame_rate
+                current_position = current_sample / frame_rate
+                
+                logger.debug("Segment %d: original %.1fs-%.1fs (%.1fs), TTS %.1fs, position %.1fs",
+                             i, original_start, original_end, original_duration, tts_duration, current_position)
+                
+                # Start at the original time, unless the previous TTS ran long - then continue right after it
+                start_sample = int(round(original_start * frame_rate))
+                if current_sample < start_sample:
+                    yield np.zeros(start_sample - current_sample, dtype=np.int16)
+                    logger.debug("Added gap to maintain timing: %.1fs", original_start - current_position)
+                    current_sample = start_sample
+                elif current_sample > start_sample:
+                    logger.debug("TTS longer than expected, continuing at current position")
+                
+                yield samples
+                current_sample += len(samples)
+                
+                logger.debug("Final position: %.1fs", current_sample / frame_rate)
     
     def get_supported_languages(self) -> list:
         """Get list of supported languages for TTS"""
-        return [
-            "en", "es", "fr", "de", "it", "pt", "ru", "ja", "ko", "zh", "hi", "ar"
-        ] 
\ No newline at end of file
+        return list(TTS_LANGUAGES) 
\ No newline at end of file
@@ -1,7 +1,64 @@
 import os
 import asyncio
-import ffmpeg
+import functools
+import json
+import logging
+import subprocess
 from typing import Optional
+from utils.fs import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+# libx264 preset names mapped to the NVENC presets of comparable speed/quality
+NVENC_PRESETS = {"fast": "p2", "medium": "p4", "slow": "p6"}
+
+# Source codecs NVDEC can decode straight into GPU memory
+NVDEC_CODECS = frozenset({"h264", "hevc", "vp9", "av1"})
+
+# SVT-AV1 CRF/preset per quality level (lower preset = slower, better compression)
+AV1_PRESETS = {
+    "low": {"crf": 35, "preset": 8},
+    "medium": {"crf": 30, "preset": 6},
+    "high": {"crf": 24, "preset": 4}
+}
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_encoders() -> frozenset:
+    """Names of the encoders the installed ffmpeg was built with"""
+    try:
+        output = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except Exception:
+        return frozenset()
+    # Encoder lines look like " V....D h264_nvenc  NVIDIA NVENC H.264 encoder"
+    return frozenset(line.split()[1] for line in output.splitlines() if len(line.split()) > 1 and len(line.split()[0]) == 6)
+
+@functools.lru_cache(maxsize=1)
+def _ffmpeg_has_soxr() -> bool:
+    """Whether the installed ffmpeg was built with libsoxr"""
+    try:
+        output = subprocess.run(["ffmpeg", "-hide_banner", "-version"], capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return False
+    return "--enable-libsoxr" in output
+
+def _parse_rational(value: str) -> float:
+    """Parse an ffprobe rational such as '30000/1001' without eval"""
+    numerator, separator, denominator = value.partition('/')
+    if separator:
+        return int(numerator) / int(denominator) if int(denominator) else 0.0
+    return float(numerator or 0)
+
+def _run_ffmpeg(args: list):
+    """Run ffmpeg directly with the given arguments, raising with its stderr on failure"""
+    try:
+        subprocess.run(
+            ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", *args],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise Exception(e.stderr.decode(errors="replace").strip() or f"ffmpeg exited with {e.returncode}")
 
 class VideoProcessor:
     def __init__(self):
@@ -9,6 +66,15 @@ class VideoProcessor:
         self.output_dir = os.getenv("OUTPUT_DIR", "./outputs")
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Encode on the GPU's NVENC block when asked to and ffmpeg supports it
+        self.use_nvenc = os.getenv("USE_NVENC", "False").lower() == "true" and "h264_nvenc" in _ffmpeg_encoders()
+        # Software AV1 (SVT-AV1) instead of libx264 for smaller archived files
+        self.use_av1 = os.getenv("COMPRESS_CODEC", "h264").lower() == "av1" and "libsvtav1" in _ffmpeg_encoders()
+        # VAAPI render node for Intel/AMD GPU encoding, if enabled and present
+        vaapi_device = os.getenv("VAAPI_DEVICE", "/dev/dri/renderD128")
+        use_vaapi = os.getenv("USE_VAAPI", "False").lower() == "true"
+        self.vaapi_device = vaapi_device if use_vaapi and os.path.exists(vaapi_device) and "h264_vaapi" in _ffmpeg_encoders() else None
     
     async def extract_audio(self, video_path: str, job_id: str) -> str:
         """Extract audio from video file"""
@@ -18,16 +84,13 @@ class VideoProcessor:
             
             # Create job-specific directory
             job_dir = os.path.join(self.temp_dir, job_id)
-            os.makedirs(job_dir, exist_ok=True)
+            ensure_dir(job_dir)
             
             # Define output audio path
             audio_path = os.path.join(job_dir, "extracted_audio.wav")
             
             # Run audio extraction in executor
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, self._extract_audio_sync, video_path, audio_path
-            )
+            await asyncio.to_thread(self._extract_audio_sync, video_path, audio_path)
             
             return audio_path
             
@@ -38,9 +101,9 @@ class VideoProcessor:
         """Synchronous audio extraction using FFmpeg"""
         try:
             # Extract audio using FFmpeg
-            stream = ffmpeg.input(video_path)
-            stream = ffmpeg.output(stream, audio_path, acodec='pcm_s16le', ac=1, ar='16000')
-            ffmpeg.run(stream, overwrite_output=True, quiet=True)
+            # libsoxr's SIMD resampler is faster than swresample's default for the downsample to 16 kHz
+            resample = ["-af", "aresample=resampler=soxr"] if _ffmpeg_has_soxr() else []
+            _run_ffmpeg(["-i", video_path, "-vn", *resample, "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000", audio_path])
             
         except Exception as e:
             raise Exception(f"FFmpeg audio extraction error: {str(e)}")
@@ -56,16 +119,13 @@ class VideoProcessor:
             
             # Create output directory
             output_dir = os.path.join(self.output_dir, job_id)
-            os.makedirs(output_dir, exist_ok=True)
+            ensure_dir(output_dir)
             
             # Define output video path
             output_path = os.path.join(output_dir, "dubbed_video.mp4")
             
             # Run video processing in executor
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, self._sync_audio_with_video_sync, video_path, audio_path, output_path
-            )
+            await asyncio.to_thread(self._sync_audio_with_video_sync, video_path, audio_path, output_path)
             
             return output_path
             
@@ -75,26 +135,39 @@ class VideoProcessor:
     def _sync_audio_with_video_sync(self, video_path: str, audio_path: str, output_path: str):
         """Synchronous video-audio synchronization using FFmpeg"""
         try:
-            # Get video and audio streams
-            video_stream = ffmpeg.input(video_path)
-            audio_stream = ffmpeg.input(audio_path)
+            # MP4 carries AAC and MP3 as-is, so only re-encode other audio (e.g. the mixed WAV)
+            if self._audio_codec(audio_path) in ("aac", "mp3"):
+                audio_args = ["-c:a", "copy"]
+            else:
+                audio_args = ["-c:a", "aac", "-b:a", "192k"]
             
             # Combine video with new audio, removing original audio
-            output_stream = ffmpeg.output(
-                video_stream['v'],  # Video stream only
-                audio_stream['a'],  # New audio stream
-                output_path,
-                vcodec='copy',      # Copy video codec (no re-encoding)
-                acodec='aac',       # Use AAC for audio
-                strict='experimental'
-            )
-            
-            # Run FFmpeg command
-            ffmpeg.run(output_stream, overwrite_output=True, quiet=True)
+            _run_ffmpeg([
+                "-i", video_path,
+                "-i", audio_path,
+                "-map", "0:v",        # Video stream only
+                "-map", "1:a",        # New audio stream
+                "-c:v", "copy",       # Copy video codec (no re-encoding)
+                *audio_args,
+                "-movflags", "+faststart",
+                output_path
+            ])
             
         except Exception as e:
             raise Exception(f"FFmpeg video processing error: {str(e)}")
     
+    def _audio_codec(self, audio_path: str) -> Optional[str]:
+        """Codec name of the first audio stream, or None if it can't be probed"""
+        try:
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name",
+                 "-of", "default=noprint_wrappers=1:nokey=1", audio_path],
+                stdin=subprocess.DEVNULL, capture_output=True, text=True, check=True
+            )
+            return result.stdout.strip() or None
+        except Exception:
+            return None
+    
     async def get_video_info(self, video_path: str) -> dict:
         """Get information about a video file"""
         try:
@@ -102,10 +175,7 @@ class VideoProcessor:
                 raise Exception(f"Video file not found: {video_path}")
             
             # Run FFmpeg probe in executor
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(
-                None, self._get_video_info_sync, video_path
-            )
+            info = await asyncio.to_thread(self._get_video_info_sync, video_path)
             
             return info
             
@@ -115,8 +185,12 @@ class VideoProcessor:
     def _get_video_info_sync(self, video_path: str) -> dict:
         """Synchronous video info extraction using FFmpeg"""
         try:
-            # Use FFmpeg probe to get video information
-            probe = ffmpeg.probe(video_path)
+            # Use ffprobe to get video information
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", video_path],
+                stdin=subprocess.DEVNULL, capture_output=True, check=True
+            )
+            probe = json.loads(result.stdout)
             
             # Extract relevant information
             format_info = probe.get('format', {})
@@ -137,7 +211,7 @@ class VideoProcessor:
                     'width': video_stream.get('width', 0) if video_stream else 0,
                     'height': video_stream.get('height', 0) if video_stream else 0,
                     'codec': video_stream.get('codec_name', 'unknown') if video_stream else 'unknown',
-                    'fps': eval(video_stream.get('r_frame_rate', '0/1')) if video_stream else 0
+                    'fps': _parse_rational(video_stream.get('r_frame_rate', '0/1')) if video_stream else 0
                 },
                 'audio': {
                     'codec': audio_stream.get('codec_name', 'unknown') if audio_stream else 'unknown',
@@ -149,17 +223,21 @@ class VideoProcessor:
         except Exception as e:
             raise Exception(f"FFmpeg probe error: {str(e)}")
     
-    async def compress_video(self, input_path: str, output_path: str, quality: str = "medium") -> str:
+    async def compress_video(self, input_path: str, output_path: str, quality: str = "medium", remux_only: bool = False) -> str:
         """Compress video to reduce file size"""
         try:
             if not os.path.exists(input_path):
                 raise Exception(f"Input video file not found: {input_path}")
             
+            # Already web-ready H.264/AAC: only move the moov atom to the front, no re-encode
+            if remux_only:
+                info = await asyncio.to_thread(self._get_video_info_sync, input_path)
+                if info['video']['codec'] == 'h264' and (info['audio'] is None or info['audio']['codec'] == 'aac'):
+                    await asyncio.to_thread(_run_ffmpeg, ["-i", input_path, "-c", "copy", "-movflags", "+faststart", output_path])
+                    return output_path
+            
             # Run compression in executor
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, self._compress_video_sync, input_path, output_path, quality
-            )
+            await asyncio.to_thread(self._compress_video_sync, input_path, output_path, quality)
             
             return output_path
             
@@ -178,23 +256,62 @@ class VideoProcessor:
             
             preset = quality_presets.get(quality, quality_presets["medium"])
             
-            # Compress video
-            stream = ffmpeg.input(input_path)
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                vcodec='libx264',
-                acodec='aac',
-                crf=preset["crf"],
-                preset=preset["preset"],
-                movflags='+faststart'
-            )
+            # Try the GPU encoders first; e.g. a source codec the hardware can't decode falls through to libx264
+            for input_args, output_args in self._hardware_encoders(preset):
+                try:
+                    _run_ffmpeg([*input_args, "-i", input_path, *output_args, "-c:a", "aac", "-movflags", "+faststart", output_path])
+                    return
+                except Exception as e:
+                    logger.debug("%s encode failed, trying next encoder: %s", output_args[output_args.index("-c:v") + 1], e)
+                    continue
+            
+            if self.use_av1:
+                av1_preset = AV1_PRESETS.get(quality, AV1_PRESETS["medium"])
+                _run_ffmpeg([
+                    "-i", input_path,
+                    "-c:v", "libsvtav1",
+                    "-pix_fmt", "yuv420p10le",
+                    "-crf", str(av1_preset["crf"]),
+                    "-preset", str(av1_preset["preset"]),
+                    "-svtav1-params", "tune=0",
+                    "-c:a", "aac",
+                    "-movflags", "+faststart",
+                    output_path
+                ])
+                return
             
-            ffmpeg.run(stream, overwrite_output=True, quiet=True)
+            # Compress video
+            _run_ffmpeg([
+                "-i", input_path,
+                "-c:v", "libx264",
+                "-crf", str(preset["crf"]),
+                "-preset", preset["preset"],
+                "-c:a", "aac",
+                "-movflags", "+faststart",
+                output_path
+            ])
             
         except Exception as e:
             raise Exception(f"FFmpeg compression error: {str(e)}")
     
+    def _hardware_encoders(self, preset: dict, source_codec: Optional[str] = None) -> list:
+        """ffmpeg input/output arguments for each enabled GPU encoder, in order of preference"""
+        encoders = []
+        if self.use_nvenc and (source_codec is None or source_codec in NVDEC_CODECS):
+            # Decode with NVDEC and keep frames on the GPU for NVENC
+            encoders.append((
+                ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"],
+                ["-c:v", "h264_nvenc", "-rc", "vbr", "-cq", str(preset["crf"]), "-b:v", "0",
+                 "-preset", NVENC_PRESETS[preset["preset"]], "-tune", "hq"]
+            ))
+        if self.vaapi_device:
+            # Intel Quick Sync / AMD VCN; software-decoded frames are uploaded before encoding
+            encoders.append((
+                ["-vaapi_device", self.vaapi_device, "-hwaccel", "vaapi", "-hwaccel_output_format", "vaapi"],
+                ["-vf", "format=nv12|vaapi,hwupload", "-c:v", "h264_vaapi", "-rc_mode", "CQP", "-qp", str(preset["crf"])]
+            ))
+        return encoders
+    
     async def create_preview(self, video_path: str, duration: int = 30, job_id: str = None) -> str:
         """Create a preview clip of the video"""
         try:
@@ -203,16 +320,13 @@ class VideoProcessor:
             
             # Create output directory
             output_dir = os.path.join(self.output_dir, job_id) if job_id else self.output_dir
-            os.makedirs(output_dir, exist_ok=True)
+            ensure_dir(output_dir)
             
             # Define output path
             output_path = os.path.join(output_dir, "preview.mp4")
             
             # Run preview creation in executor
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, self._create_preview_sync, video_path, output_path, duration
-            )
+            await asyncio.to_thread(self._create_preview_sync, video_path, output_path, duration)
             
             return output_path
             
@@ -223,15 +337,28 @@ class VideoProcessor:
         """Synchronous preview creation using FFmpeg"""
         try:
             # Create preview by taking first N seconds
-            stream = ffmpeg.input(video_path, t=duration)
-            stream = ffmpeg.output(
-                stream,
-                output_path,
-                vcodec='copy',
-                acodec='copy'
-            )
-            
-            ffmpeg.run(stream, overwrite_output=True, quiet=True)
+            try:
+                _run_ffmpeg(["-t", str(duration), "-i", video_path, "-c:v", "copy", "-c:a", "copy", output_path])
+                return
+            except Exception as copy_error:
+                logger.debug("Preview stream copy failed, re-encoding: %s", copy_error)
+            
+            # Stream copy failed: re-encode, on the GPU end to end (NVDEC -> NVENC) when available
+            preset = {"crf": 23, "preset": "fast"}
+            source_codec = self._get_video_info_sync(video_path)['video']['codec']
+            for input_args, output_args in self._hardware_encoders(preset, source_codec):
+                try:
+                    _run_ffmpeg([*input_args, "-t", str(duration), "-i", video_path, *output_args, "-c:a", "copy", output_path])
+                    return
+                except Exception as e:
+                    logger.debug("%s encode failed, trying next encoder: %s", output_args[output_args.index("-c:v") + 1], e)
+                    continue
+            
+            _run_ffmpeg([
+                "-t", str(duration), "-i", video_path,
+                "-c:v", "libx264", "-crf", str(preset["crf"]), "-preset", preset["preset"],
+                "-c:a", "copy", output_path
+            ])
             
         except Exception as e:
             raise Exception(f"FFmpeg preview creation error: {str(e)}") 
\ No newline at end of file
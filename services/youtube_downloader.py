@@ -1,23 +1,48 @@
 import os
+import sys
 import asyncio
+import shutil
+import logging
+import subprocess
+import threading
 import yt_dlp
 from typing import Optional
+from utils.fs import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+# One YoutubeDL for info lookups: extractors are set up once and reused (YoutubeDL isn't thread-safe)
+_YDL = None
+_YDL_LOCK = threading.Lock()
 
 class YouTubeDownloader:
     def __init__(self):
         self.download_dir = os.getenv("UPLOAD_DIR", "./uploads")
         os.makedirs(self.download_dir, exist_ok=True)
+        # Parallel HLS/DASH fragment downloads per job
+        self.concurrent_fragments = int(os.getenv("YTDLP_CONCURRENT_FRAGMENTS", "16"))
+        # aria2c splits plain HTTP downloads over several connections when it's installed
+        self.use_aria2c = shutil.which("aria2c") is not None
+        # yt-dlp's disk cache keeps YouTube's deciphered player signatures across downloads and restarts
+        self.cache_dir = os.path.join(self.download_dir, ".ytdlp-cache")
     
-    async def download_video(self, youtube_url: str, job_id: str) -> str:
+    async def download_video(self, youtube_url: str, job_id: str, video_only: bool = False) -> str:
         """Download a YouTube video and return the path to the downloaded file"""
         try:
             # Create job-specific directory
             job_dir = os.path.join(self.download_dir, job_id)
-            os.makedirs(job_dir, exist_ok=True)
+            ensure_dir(job_dir)
+            
+            # Limit to 720p for faster processing; MP4 video + M4A audio merge by stream copy
+            video_format = 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best[height<=720]'
+            if video_only:
+                # The audio track comes from download_audio, so skip fetching it a second time
+                video_format = 'bestvideo[height<=720][ext=mp4]/bestvideo[height<=720]/best[height<=720]'
             
             # Configure yt-dlp options
             ydl_opts = {
-                'format': 'best[height<=720]',  # Limit to 720p for faster processing
+                'format': video_format,
+                'concurrent_fragment_downloads': self.concurrent_fragments,
                 'outtmpl': os.path.join(job_dir, '%(title)s.%(ext)s'),
                 'quiet': True,
                 'no_warnings': True,
@@ -25,33 +50,74 @@ class YouTubeDownloader:
             }
             
             # Download the video
-            loop = asyncio.get_event_loop()
-            video_path = await loop.run_in_executor(
-                None, self._download_with_ytdlp, youtube_url, ydl_opts, job_dir
-            )
+            video_path = await self._download_with_ytdlp(youtube_url, ydl_opts, job_dir)
             
             return video_path
             
         except Exception as e:
             raise Exception(f"Failed to download YouTube video: {str(e)}")
     
-    def _download_with_ytdlp(self, youtube_url: str, ydl_opts: dict, job_dir: str) -> str:
-        """Download video using yt-dlp in a synchronous manner"""
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # Get video info first
-            info = ydl.extract_info(youtube_url, download=False)
-            video_title = info.get('title', 'video')
+    async def download_audio(self, youtube_url: str, job_id: str) -> str:
+        """Download only the audio track, so processing can start before the video finishes"""
+        try:
+            # Separate directory so the audio file is never mistaken for the video
+            audio_dir = os.path.join(self.download_dir, job_id, "audio")
+            ensure_dir(audio_dir)
             
-            # Download the video
-            ydl.download([youtube_url])
+            ydl_opts = {
+                'format': 'bestaudio/best',
+                'concurrent_fragment_downloads': self.concurrent_fragments,
+                'outtmpl': os.path.join(audio_dir, 'audio.%(ext)s'),
+                'quiet': True,
+                'no_warnings': True,
+            }
             
-            # Find the downloaded file in the job directory
-            print(f"Debug: job_dir = {job_dir}")
-            for filename in os.listdir(job_dir):
-                if filename.endswith(('.mp4', '.webm', '.mkv')):
-                    return os.path.join(job_dir, filename)
+            return await self._download_with_ytdlp(
+                youtube_url, ydl_opts, audio_dir, ('.m4a', '.webm', '.opus', '.mp3', '.mp4')
+            )
             
-            raise Exception("Downloaded video file not found")
+        except Exception as e:
+            raise Exception(f"Failed to download YouTube audio: {str(e)}")
+    
+    async def _download_with_ytdlp(self, youtube_url: str, ydl_opts: dict, job_dir: str, extensions: tuple = ('.mp4', '.webm', '.mkv')) -> str:
+        """Download video by running yt-dlp in its own process, so concurrent jobs don't share the GIL"""
+        command = [sys.executable, "-m", "yt_dlp", "-f", ydl_opts['format'], "-o", ydl_opts['outtmpl'], "--cache-dir", self.cache_dir]
+        if ydl_opts.get('quiet'):
+            command.append("--quiet")
+        if ydl_opts.get('no_warnings'):
+            command.append("--no-warnings")
+        if ydl_opts.get('concurrent_fragment_downloads'):
+            command += ["-N", str(ydl_opts['concurrent_fragment_downloads'])]
+        if self.use_aria2c:
+            command += ["--downloader", "aria2c", "--downloader-args", "aria2c:-x 16 -s 16 -k 1M"]
+        # Report where the final (merged/moved) file ended up
+        command += ["--print", "after_move:filepath"]
+        
+        process = await asyncio.create_subprocess_exec(
+            *command, youtube_url,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            # The job was abandoned: stop the download instead of letting it run to completion
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise Exception(stderr.decode(errors="replace").strip() or f"yt-dlp exited with {process.returncode}")
+        
+        printed_paths = stdout.decode(errors="replace").strip().splitlines()
+        if printed_paths and os.path.exists(printed_paths[-1]):
+            return printed_paths[-1]
+        
+        # Find the downloaded file in the job directory
+        logger.debug("job_dir = %s", job_dir)
+        for filename in os.listdir(job_dir):
+            if filename.endswith(extensions):
+                return os.path.join(job_dir, filename)
+        
+        raise Exception("Downloaded video file not found")
     
     async def get_video_info(self, youtube_url: str) -> dict:
         """Get information about a YouTube video without downloading"""
@@ -60,12 +126,10 @@ class YouTubeDownloader:
                 'quiet': True,
                 'no_warnings': True,
                 'extract_flat': True,
+                'cachedir': self.cache_dir,
             }
             
-            loop = asyncio.get_event_loop()
-            info = await loop.run_in_executor(
-                None, self._extract_info_with_ytdlp, youtube_url, ydl_opts
-            )
+            info = await asyncio.to_thread(self._extract_info_with_ytdlp, youtube_url, ydl_opts)
             
             return {
                 'title': info.get('title', 'Unknown'),
@@ -80,5 +144,8 @@ class YouTubeDownloader:
     
     def _extract_info_with_ytdlp(self, youtube_url: str, ydl_opts: dict) -> dict:
         """Extract video info using yt-dlp in a synchronous manner"""
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(youtube_url, download=False) 
\ No newline at end of file
+        global _YDL
+        with _YDL_LOCK:
+            if _YDL is None:
+                _YDL = yt_dlp.YoutubeDL(ydl_opts)
+            return _YDL.extract_info(youtube_url, download=False) 
\ No newline at end of file
@@ -8,6 +8,7 @@ import os
 import sys
 import subprocess
 from pathlib import Path
+from importlib.util import find_spec
 
 def check_dependencies():
     """Check if required dependencies are installed"""
@@ -24,18 +25,18 @@ def check_dependencies():
         print("  Windows: Download from https://ffmpeg.org/download.html")
         return False
     
-    # Check if Python packages are installed
+    # Check if Python packages are installed (find_spec locates them without importing torch etc.)
     required_packages = [
-        'fastapi', 'uvicorn', 'yt-dlp', 'openai-whisper', 
-        'googletrans', 'elevenlabs', 'pydub', 'ffmpeg-python'
+        ('fastapi', 'fastapi'), ('uvicorn', 'uvicorn'), ('yt-dlp', 'yt_dlp'),
+        ('faster-whisper', 'faster_whisper'),
+        ('googletrans', 'googletrans'), ('elevenlabs', 'elevenlabs'), ('pydub', 'pydub')
     ]
     
     missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
+    for package, module in required_packages:
+        if find_spec(module) is not None:
             print(f"✓ {package} is installed")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print(f"✗ {package} is not installed")
     
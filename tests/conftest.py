@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the services/ and utils/ packages importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,52 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# AIDubber pulls in the full model stack at import time
+pytest.importorskip("faster_whisper")
+pytest.importorskip("pyannote.audio")
+
+from services.ai_dubber import AIDubber
+from services.translator import Translator
+
+
+class FakeCompletions:
+    """Answers batched translation prompts and records every request"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        # The batch prompt carries the items as a JSON list on its "Items:" line; "translate" by upper-casing
+        items_line = next(line for line in kwargs["messages"][1]["content"].splitlines() if line.startswith("Items: "))
+        items = json.loads(items_line[len("Items: "):])
+        translations = [{"id": item["id"], "translation": item["text"].upper()} for item in items]
+        message = SimpleNamespace(content=json.dumps({"translations": translations}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+def test_segment_groups_are_translated_in_one_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP_DIR", str(tmp_path))
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    translator = Translator()
+    completions = FakeCompletions()
+    translator._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    # Skip the model loading in __init__; only the translator is needed here
+    dubber = AIDubber.__new__(AIDubber)
+    dubber.translator = translator
+
+    groups = [
+        {"speaker_id": "SPEAKER_00", "start_time": 0.0, "end_time": 2.0, "text": "hello there"},
+        {"speaker_id": "SPEAKER_01", "start_time": 2.5, "end_time": 4.0, "text": "good morning"},
+        {"speaker_id": "SPEAKER_00", "start_time": 4.5, "end_time": 6.0, "text": "see you soon"},
+    ]
+
+    translated = asyncio.run(dubber._translate_segment_groups(groups, "es"))
+
+    assert len(completions.calls) == 1
+    assert [group["translated_text"] for group in translated] == ["HELLO THERE", "GOOD MORNING", "SEE YOU SOON"]
@@ -0,0 +1,7 @@
+import os
+
+def ensure_dir(path: str):
+    """Create a directory if it doesn't exist (it may have been removed since, e.g. by job cleanup)"""
+    # One stat on the common path; makedirs walks and mkdirs every parent
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
@@ -1,33 +1,56 @@
 import os
 import json
-import time
+import logging
+import sqlite3
+import threading
 from typing import Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
 
 class JobManager:
     def __init__(self):
-        self.jobs = {}
-        self.jobs_file = os.path.join(os.getenv("TEMP_DIR", "./temp"), "jobs.json")
-        self._load_jobs()
+        temp_dir = os.getenv("TEMP_DIR", "./temp")
+        os.makedirs(temp_dir, exist_ok=True)
+        self.db_path = os.path.join(temp_dir, "jobs.db")
+        self.jobs_file = os.path.join(temp_dir, "jobs.json")
+        self._lock = threading.Lock()
+        
+        # One row per job, so an update rewrites that job only instead of the whole job list
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT, progress INTEGER, created_at TEXT, updated_at TEXT, payload TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs(status)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_created_at ON jobs(created_at)")
+        self._import_json_jobs()
     
-    def _load_jobs(self):
-        """Load jobs from persistent storage"""
+    def _import_json_jobs(self):
+        """Move jobs from the old jobs.json store into the database"""
         try:
-            if os.path.exists(self.jobs_file):
-                with open(self.jobs_file, 'r') as f:
-                    self.jobs = json.load(f)
+            if not os.path.exists(self.jobs_file):
+                return
+            with open(self.jobs_file, 'r') as f:
+                jobs = json.load(f)
+            with self._lock:
+                self.conn.execute("BEGIN")
+                for job_id, job in jobs.items():
+                    self._write_job(job_id, job, replace=False)
+                self.conn.execute("COMMIT")
+            os.replace(self.jobs_file, f"{self.jobs_file}.migrated")
         except Exception as e:
-            print(f"Error loading jobs: {e}")
-            self.jobs = {}
+            logger.warning("Error importing jobs: %s", e)
     
-    def _save_jobs(self):
-        """Save jobs to persistent storage"""
-        try:
-            os.makedirs(os.path.dirname(self.jobs_file), exist_ok=True)
-            with open(self.jobs_file, 'w') as f:
-                json.dump(self.jobs, f, indent=2)
-        except Exception as e:
-            print(f"Error saving jobs: {e}")
+    def _write_job(self, job_id: str, job: Dict, replace: bool = True):
+        """Insert or replace a job row; the payload holds the full job, the columns mirror what we query on"""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self.conn.execute(
+            f"{verb} INTO jobs (id, status, progress, created_at, updated_at, payload) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, job.get("status"), job.get("progress", 0), job.get("created_at"), job.get("updated_at"), json.dumps(job))
+        )
     
     def create_job(self, job_id: str, job_data: Dict):
         """Create a new job"""
@@ -38,83 +61,77 @@ class JobManager:
             "progress": 0
         })
         
-        self.jobs[job_id] = job_data
-        self._save_jobs()
+        with self._lock:
+            self._write_job(job_id, job_data)
     
     def get_job(self, job_id: str) -> Optional[Dict]:
         """Get job by ID"""
-        return self.jobs.get(job_id)
+        row = self.conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
     
     def update_job(self, job_id: str, updates: Dict):
         """Update job with new data"""
-        if job_id in self.jobs:
-            self.jobs[job_id].update(updates)
-            self.jobs[job_id]["updated_at"] = datetime.now().isoformat()
-            self._save_jobs()
+        with self._lock:
+            row = self.conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row:
+                job = json.loads(row[0])
+                job.update(updates)
+                job["updated_at"] = datetime.now().isoformat()
+                self._write_job(job_id, job)
     
     def delete_job(self, job_id: str):
         """Delete a job"""
-        if job_id in self.jobs:
-            del self.jobs[job_id]
-            self._save_jobs()
+        with self._lock:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
     
     def get_all_jobs(self) -> Dict:
         """Get all jobs"""
-        return self.jobs
+        return {job_id: json.loads(payload) for job_id, payload in self.conn.execute("SELECT id, payload FROM jobs")}
     
     def get_jobs_by_status(self, status: str) -> Dict:
         """Get jobs filtered by status"""
-        return {job_id: job for job_id, job in self.jobs.items() if job.get("status") == status}
+        rows = self.conn.execute("SELECT id, payload FROM jobs WHERE status = ?", (status,))
+        return {job_id: json.loads(payload) for job_id, payload in rows}
     
     def cleanup_old_jobs(self, max_age_hours: int = 24):
         """Clean up old completed or failed jobs"""
-        current_time = datetime.now()
-        jobs_to_delete = []
+        # ISO timestamps sort chronologically, so the age check is an indexed range delete
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND created_at < ?", (cutoff,)
+            )
         
-        for job_id, job in self.jobs.items():
-            if job.get("status") in ["completed", "failed"]:
-                created_at = datetime.fromisoformat(job.get("created_at", "1970-01-01T00:00:00"))
-                age_hours = (current_time - created_at).total_seconds() / 3600
-                
-                if age_hours > max_age_hours:
-                    jobs_to_delete.append(job_id)
-        
-        for job_id in jobs_to_delete:
-            self.delete_job(job_id)
-        
-        return len(jobs_to_delete)
+        return cursor.rowcount
     
     def get_job_stats(self) -> Dict:
         """Get statistics about jobs"""
-        total_jobs = len(self.jobs)
-        status_counts = {}
-        
-        for job in self.jobs.values():
-            status = job.get("status", "unknown")
-            status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = {
+            status or "unknown": count
+            for status, count in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        }
         
         return {
-            "total_jobs": total_jobs,
+            "total_jobs": sum(status_counts.values()),
             "status_counts": status_counts,
             "recent_jobs": self._get_recent_jobs(10)
         }
     
     def _get_recent_jobs(self, limit: int) -> list:
         """Get recent jobs sorted by creation time"""
-        sorted_jobs = sorted(
-            self.jobs.items(),
-            key=lambda x: x[1].get("created_at", ""),
-            reverse=True
-        )
+        rows = self.conn.execute(
+            "SELECT id, payload FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
         
-        return [
-            {
+        recent_jobs = []
+        for job_id, payload in rows:
+            job = json.loads(payload)
+            recent_jobs.append({
                 "job_id": job_id,
                 "status": job.get("status"),
                 "progress": job.get("progress", 0),
                 "created_at": job.get("created_at"),
                 "youtube_url": job.get("youtube_url", ""),
                 "target_language": job.get("target_language", "")
-            }
-            for job_id, job in sorted_jobs[:limit]
-        ] 
\ No newline at end of file
+            })
+        return recent_jobs 
\ No newline at end of file
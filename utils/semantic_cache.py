@@ -0,0 +1,116 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+from typing import Optional
+from utils.fs import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+class SemanticCache:
+    def __init__(self, cache_dir: str, threshold: float = 0.92):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.embeddings_file = os.path.join(cache_dir, "embeddings.npy")
+        self.entries_file = os.path.join(cache_dir, "entries.json")
+        # Row buffer grown by doubling so an insert doesn't copy the whole index
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self.entries = []
+        # (target_language, word_bucket) -> row indices, so lookups never walk all entries
+        self._rows = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._matrix[:self._size]
+
+    def _load(self):
+        """Load the embedding index and its translations from disk"""
+        try:
+            if os.path.exists(self.embeddings_file) and os.path.exists(self.entries_file):
+                embeddings = np.load(self.embeddings_file)
+                with open(self.entries_file, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                if len(entries) != len(embeddings):
+                    raise Exception("embeddings and entries are out of sync")
+                self._matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+                self._size = len(entries)
+                self.entries = entries
+                for i, entry in enumerate(entries):
+                    self._rows.setdefault((entry["target_language"], entry["word_bucket"]), []).append(i)
+        except Exception as e:
+            logger.warning("Error loading semantic cache: %s", e)
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._size = 0
+            self.entries = []
+            self._rows = {}
+
+    def flush(self):
+        """Persist the embedding index and its translations if anything was added since the last flush"""
+        with self._lock:
+            if not self._dirty:
+                return
+            embeddings = self.embeddings.copy()
+            entries = list(self.entries)
+            self._dirty = False
+
+        try:
+            ensure_dir(self.cache_dir)
+            # Write to temp files and swap them in, so a crash never leaves a half-written index
+            np.save(f"{self.embeddings_file}.tmp.npy", embeddings)
+            with open(f"{self.entries_file}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(f"{self.embeddings_file}.tmp.npy", self.embeddings_file)
+            os.replace(f"{self.entries_file}.tmp", self.entries_file)
+        except Exception as e:
+            logger.warning("Error saving semantic cache: %s", e)
+            with self._lock:
+                self._dirty = True
+
+    @staticmethod
+    def _bucket(target_word_count: int) -> int:
+        """Round word counts to the nearest 2 so cached timing stays plausible"""
+        return int(round(target_word_count / 2.0)) * 2
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, embedding, target_language: str, target_word_count: int) -> Optional[str]:
+        """Return a cached translation whose source is semantically close enough, if any"""
+        with self._lock:
+            candidates = self._rows.get((target_language, self._bucket(target_word_count)))
+            if not candidates:
+                return None
+
+            # Inner product of unit vectors == cosine similarity
+            scores = self._matrix[candidates] @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] > self.threshold:
+                return self.entries[candidates[best]]["translation"]
+            return None
+
+    def add(self, embedding, target_language: str, target_word_count: int, translation: str):
+        """Store a translation under its source embedding (in memory; persisted by flush)"""
+        with self._lock:
+            vector = self._normalize(embedding)
+            if self._size == len(self._matrix):
+                grown = np.zeros((max(64, self._size * 2), len(vector)), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size] = vector
+            bucket = self._bucket(target_word_count)
+            self._rows.setdefault((target_language, bucket), []).append(self._size)
+            self._size += 1
+            self.entries.append({
+                "target_language": target_language,
+                "word_bucket": bucket,
+                "translation": translation
+            })
+            self._dirty = True